@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+TEMP_PRERENDER_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(PRERENDER_ROOT=TEMP_PRERENDER_ROOT)
+class PrerenderTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('prerender', stdout=open(os.devnull, 'w'))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PRERENDER_ROOT, ignore_errors=True)
+
+    def test_pages_built(self):
+        """Страницы about сохранены вместе с загрузчиком блока пользователя."""
+        for name in ('author', 'tech'):
+            with self.subTest(name=name):
+                path = os.path.join(
+                    TEMP_PRERENDER_ROOT, 'about', name, 'index.html'
+                )
+                with open(path, encoding='utf-8') as file:
+                    html = file.read()
+                self.assertIn('data-user-nav', html)
+                self.assertIn(f'about%3A{name}', html)
+                self.assertTrue(os.path.exists(path + '.gz'))
+
+    def test_served_from_disk(self):
+        """Сохранённая страница отдаётся без сессии и шаблонов."""
+        client = Client()
+        client.force_login(User.objects.create_user(username='user'))
+        with self.assertNumQueries(0):
+            response = client.get('/about/tech/')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTemplateNotUsed(response, 'about/tech.html')
+        self.assertIn(b'data-user-nav', b''.join(response.streaming_content))
+
+    def test_header_fragment(self):
+        """Фрагмент шапки показывает вошедшего пользователя."""
+        client = Client()
+        client.force_login(User.objects.create_user(username='user'))
+        response = client.get('/fragments/header-user/?view=about:tech')
+        self.assertContains(response, 'Пользователь: user')
+        self.assertIn('private', response['Cache-Control'])
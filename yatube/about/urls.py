@@ -1,11 +1,16 @@
 from django.urls import path
 
+from core.prerender import prerender
 from . import views
 
 
 app_name = 'about'
 
 urlpatterns = [
-    path('author/', views.AboutAuthorView.as_view(), name='author'),
-    path('tech/', views.AboutTechView.as_view(), name='tech'),
+    path(
+        'author/',
+        prerender(views.AboutAuthorView.as_view()),
+        name='author'
+    ),
+    path('tech/', prerender(views.AboutTechView.as_view()), name='tech'),
 ]
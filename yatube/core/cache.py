@@ -0,0 +1,151 @@
+import hashlib
+import math
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_response_headers
+
+from .compression import precompress
+
+
+# кэши, которые видит только создавший их процесс
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def shared_cache(alias='default'):
+    """Видят ли кэш все процессы: веб, воркер очереди и команды."""
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+
+def lock_key(key):
+    return f'{key}:lock'
+
+
+def wait_for(key):
+    """Ждёт, пока значение посчитает процесс, взявший блокировку."""
+    deadline = time.monotonic() + settings.SINGLE_FLIGHT_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(settings.SINGLE_FLIGHT_POLL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+    return None
+
+
+def single_flight(key, compute, timeout):
+    """Значение из кэша, при промахе его вычисляет только один процесс.
+
+    Остальные ждут результат, пока держится блокировка. Значение
+    хранится как есть, поэтому к нему применимы incr и decr.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+    if cache.add(lock_key(key), 1, settings.SINGLE_FLIGHT_LOCK_TIMEOUT):
+        try:
+            value = compute()
+            cache.set(key, value, timeout)
+        finally:
+            cache.delete(lock_key(key))
+        return value
+    value = wait_for(key)
+    if value is None:
+        # процесс с блокировкой не успел, считаем сами
+        value = compute()
+    return value
+
+
+def get_or_compute(key, compute, timeout, stale_timeout=None, beta=1.0):
+    """Значение из кэша с ранним обновлением и отдачей устаревшего.
+
+    Запись живёт timeout + stale_timeout секунд. Незадолго до истечения
+    timeout значение с растущей вероятностью пересчитывается заранее
+    (тем раньше, чем дольше compute). Пока один процесс пересчитывает,
+    остальные получают прежнее значение.
+    """
+    if stale_timeout is None:
+        stale_timeout = settings.CACHE_STALE_TIMEOUT
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires, delta = entry
+        jitter = -delta * beta * math.log(1 - random.random())
+        if time.time() + jitter < expires:
+            return value
+    if not cache.add(lock_key(key), 1, settings.SINGLE_FLIGHT_LOCK_TIMEOUT):
+        if entry is None:
+            entry = wait_for(key)
+        if entry is not None:
+            return entry[0]
+        return compute()
+    try:
+        start = time.monotonic()
+        value = compute()
+        delta = time.monotonic() - start
+        cache.set(
+            key,
+            (value, time.time() + timeout, delta),
+            timeout + stale_timeout
+        )
+    finally:
+        cache.delete(lock_key(key))
+    return value
+
+
+def page_cache_key(request):
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    user = request.user.pk if request.user.is_authenticated else 'anon'
+    return f'page:{url}:{user}'
+
+
+class Uncacheable(Exception):
+    """Ответ, который нельзя отдавать из кэша другим запросам."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+def cacheable(response):
+    """Те же проверки, что в UpdateCacheMiddleware, но ответ с cookies
+    не кэшируется вовсе: их получили бы чужие пользователи."""
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and 'private' not in response.get('Cache-Control', '')
+    )
+
+
+def cache_page_single_flight(timeout):
+    """Аналог cache_page, при истечении которого страницу строит
+    один запрос, а остальные получают предыдущую версию.
+
+    Вместе со страницей кэшируются её сжатые варианты."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+
+            def build():
+                response = view_func(request, *args, **kwargs)
+                if not cacheable(response):
+                    raise Uncacheable(response)
+                return precompress(response)
+
+            try:
+                response = get_or_compute(
+                    page_cache_key(request), build, timeout
+                )
+            except Uncacheable as error:
+                return error.response
+            patch_response_headers(response, timeout)
+            return response
+        return wrapper
+    return decorator
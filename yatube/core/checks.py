@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+from .cache import shared_cache
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Задачи очереди пишут в кэш то, что читают веб-процессы."""
+    if shared_cache() or settings.JOBS_EAGER:
+        return []
+    return [Warning(
+        'Кэш по умолчанию виден только своему процессу, а задачи '
+        'выполняет отдельный воркер.',
+        hint=(
+            'Прибавки счётчиков, рейтинги, рекомендации и события '
+            'не дойдут до других процессов. Укажите в CACHES общий '
+            'кэш: базу данных, memcached или Redis.'
+        ),
+        id='core.W001',
+    )]
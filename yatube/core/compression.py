@@ -0,0 +1,113 @@
+import gzip
+import re
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# расширения файлов статики, из которых имеет смысл делать .gz и .br
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.ico', '.txt', '.json', '.html', '.xml'
+)
+# суффикс файла с готовым сжатым вариантом
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+# типы ответов, которые сжимает CompressionMiddleware
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/(html|plain|css|csv|javascript|xml)|'
+    r'application/(json|javascript|xml|xhtml\+xml))\b'
+)
+ACCEPT_ENCODING = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?')
+
+
+def available_encodings():
+    """Поддерживаемые кодировки в порядке предпочтения."""
+    if brotli is None:
+        return ('gzip',)
+    return ('br', 'gzip')
+
+
+def accepted_encodings(request):
+    """Кодировки из Accept-Encoding с ненулевым весом."""
+    accepted = {}
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        match = ACCEPT_ENCODING.match(item)
+        if match is None:
+            continue
+        encoding, quality = match.groups()
+        try:
+            accepted[encoding.lower()] = float(quality or 1)
+        except ValueError:
+            continue
+    return {
+        encoding for encoding, quality in accepted.items() if quality > 0
+    }
+
+
+def choose_encoding(request, encodings=None):
+    """Лучшая кодировка, которую понимает клиент, или None."""
+    if encodings is None:
+        encodings = available_encodings()
+    accepted = accepted_encodings(request)
+    for encoding in encodings:
+        if encoding in accepted or '*' in accepted:
+            return encoding
+    return None
+
+
+def compress(data, encoding, dynamic=False):
+    """Сжатие целиком: максимальное для статики, быстрее — для страниц."""
+    if encoding == 'br':
+        quality = settings.COMPRESSION_BROTLI_QUALITY if dynamic else 11
+        return brotli.compress(data, quality=quality)
+    level = settings.COMPRESSION_GZIP_LEVEL if dynamic else 9
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_stream(chunks, encoding):
+    """Сжимает поток по частям, каждая часть уходит клиенту сразу."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(
+            quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(
+        settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+    )
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def precompress(response):
+    """Сохраняет в ответе его сжатые варианты.
+
+    Вызывается перед записью страницы в кэш: варианты кэшируются
+    вместе с ней, и CompressionMiddleware не сжимает её заново.
+    """
+    if not compressible(response):
+        return response
+    response.compressed = {
+        encoding: compress(response.content, encoding, dynamic=True)
+        for encoding in available_encodings()
+    }
+    return response
+
+
+def compressible(response):
+    """Стоит ли сжимать ответ."""
+    if response.has_header('Content-Encoding'):
+        return False
+    if response.status_code != 200:
+        return False
+    if not COMPRESSIBLE_TYPES.match(response.get('Content-Type', '')):
+        return False
+    return response.streaming or (
+        len(response.content) >= settings.COMPRESSION_MIN_SIZE
+    )
@@ -0,0 +1,9 @@
+from django.conf import settings
+from django.urls import reverse
+
+
+def sidebar(request):
+    """Добавляет адрес фрагмента «Популярное», если колонка включена."""
+    if not settings.POPULAR_SIDEBAR:
+        return {}
+    return {'popular_sidebar_url': reverse('posts:popular_sidebar')}
@@ -0,0 +1,124 @@
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from jobs.queue import enqueue
+from .cache import lock_key
+from .tasks import flush_counter
+
+_counters = {}
+
+
+def get_counter(name):
+    return _counters[name]
+
+
+class BufferedCounter:
+    """Счётчик в поле модели, прибавки к которому копятся в кэше.
+
+    incr не пишет в базу: прибавка ложится в кэш, а id объекта — в
+    журнал изменённых. flush раз в COUNTERS_FLUSH_INTERVAL секунд
+    переносит накопленное в базу UPDATE-ами по группам с одинаковой
+    прибавкой. При потере кэша теряется только не перенесённое.
+    """
+
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self.name = f'{model._meta.label_lower}.{field}'
+        _counters[self.name] = self
+
+    def key(self, *parts):
+        return ':'.join(['counter', self.name, *map(str, parts)])
+
+    def incr(self, pk, delta=1):
+        pending = self.key('pending', pk)
+        cache.add(pending, 0, settings.COUNTERS_TIMEOUT)
+        try:
+            cache.incr(pending, delta)
+        except ValueError:
+            # ключ успел истечь между add и incr
+            cache.set(pending, delta, settings.COUNTERS_TIMEOUT)
+        if cache.add(self.key('dirty', pk), 1, settings.COUNTERS_TIMEOUT):
+            # в журнал объект попадает один раз до ближайшего flush
+            cache.add(self.key('seq'), 0, None)
+            seq = cache.incr(self.key('seq'))
+            cache.set(self.key('log', seq), pk, settings.COUNTERS_TIMEOUT)
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        """Одна задача flush на каждый интервал, в котором были прибавки."""
+        interval = settings.COUNTERS_FLUSH_INTERVAL
+        window = int(time.time() // interval)
+        if cache.add(self.key('scheduled', window), 1, interval * 2):
+            enqueue(
+                flush_counter, self.name,
+                key=self.key('flush', window), delay=interval
+            )
+
+    def pending(self, pks):
+        """Ещё не перенесённые в базу прибавки по id объектов."""
+        keys = {self.key('pending', pk): pk for pk in pks}
+        return {
+            keys[key]: delta
+            for key, delta in cache.get_many(keys).items() if delta
+        }
+
+    def get(self, obj):
+        """Значение поля вместе с прибавками из кэша."""
+        return getattr(obj, self.field) + self.pending([obj.pk]).get(
+            obj.pk, 0
+        )
+
+    def take(self, pks):
+        """Забирает прибавки из кэша, не теряя пришедшие параллельно."""
+        cache.delete_many([self.key('dirty', pk) for pk in pks])
+        taken = self.pending(pks)
+        for pk, delta in taken.items():
+            try:
+                cache.decr(self.key('pending', pk), delta)
+            except ValueError:
+                pass
+        return taken
+
+    def flush(self):
+        """Переносит прибавки в базу, возвращает число изменённых объектов."""
+        lock = lock_key(self.key('flush'))
+        if not cache.add(lock, 1, settings.COUNTERS_FLUSH_INTERVAL):
+            return 0
+        try:
+            start = cache.get(self.key('flushed'), 0)
+            end = cache.get(self.key('seq'), 0)
+            if end <= start:
+                return 0
+            log = cache.get_many(
+                [self.key('log', seq) for seq in range(start + 1, end + 1)]
+            )
+            taken = self.take(set(log.values()))
+            by_delta = defaultdict(list)
+            for pk, delta in taken.items():
+                by_delta[delta].append(pk)
+            try:
+                with transaction.atomic():
+                    for delta, pks in by_delta.items():
+                        self.model.objects.filter(pk__in=pks).update(
+                            **{self.field: F(self.field) + delta}
+                        )
+            except Exception:
+                # прибавки возвращаются в кэш до следующей попытки
+                for pk, delta in taken.items():
+                    self.incr(pk, delta)
+                raise
+            cache.set(self.key('flushed'), end, None)
+            cache.delete_many(list(log))
+            return len(taken)
+        finally:
+            cache.delete(lock)
+
+
+def flush_all():
+    return {name: counter.flush() for name, counter in _counters.items()}
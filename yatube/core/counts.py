@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+
+def estimate_table_rows(model, using='default'):
+    """Примерное число строк в таблице модели по статистике СУБД.
+
+    Postgres хранит оценку планировщика в pg_class, SQLite — в таблице
+    sqlite_stat1 после ANALYZE. Если оценки нет, возвращает None.
+    """
+    table = model._meta.db_table
+    connection = connections[using]
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class '
+                    'WHERE relname = %s',
+                    [table]
+                )
+                rows = [row[0] for row in cursor.fetchall()]
+            elif connection.vendor == 'sqlite':
+                cursor.execute(
+                    'SELECT stat FROM sqlite_stat1 WHERE tbl = %s',
+                    [table]
+                )
+                rows = [int(row[0].split()[0]) for row in cursor.fetchall()]
+            else:
+                return None
+    except DatabaseError:
+        # статистика ещё не собиралась
+        return None
+    rows = [row for row in rows if row is not None and row >= 0]
+    return max(rows) if rows else None
+
+
+def count_rows(queryset):
+    """Число объектов в queryset.
+
+    Для запросов без фильтров по большим таблицам берётся оценка СУБД,
+    в остальных случаях — точный COUNT(*).
+    """
+    if not queryset.query.where:
+        estimate = estimate_table_rows(queryset.model, queryset.db)
+        if estimate is not None and (
+            estimate >= settings.COUNT_ESTIMATE_THRESHOLD
+        ):
+            return estimate
+    return queryset.count()
@@ -0,0 +1,92 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from jobs.queue import enqueue
+from .tasks import purge_surrogate_keys
+
+_local = threading.local()
+
+
+def add_surrogate_keys(response, *keys):
+    """Ключи, по которым прокси сбросит закэшированный ответ."""
+    keys = response.get('Surrogate-Key', '').split() + list(keys)
+    response['Surrogate-Key'] = ' '.join(dict.fromkeys(keys))
+    return response
+
+
+def edge_cache(view_func):
+    """Разрешает прокси кэшировать страницу для анонимов.
+
+    Браузер каждый раз переспрашивает страницу, а прокси хранит её
+    EDGE_CACHE_TIMEOUT секунд или до сброса по Surrogate-Key.
+    Ответы с no-store или private (например, устаревшие копии
+    из stale_if_error) не трогаются.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        patch_vary_headers(response, ('Cookie',))
+        if request.method not in ('GET', 'HEAD'):
+            return response
+        if response.status_code != 200:
+            return response
+        cache_control = response.get('Cache-Control', '')
+        if 'no-store' in cache_control or 'private' in cache_control:
+            return response
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True)
+            return response
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=0,
+            s_maxage=settings.EDGE_CACHE_TIMEOUT
+        )
+        return response
+    return wrapper
+
+
+def enqueue_purge(keys):
+    keys = sorted(keys)
+    size = settings.EDGE_PURGE_BATCH_SIZE
+    for start in range(0, len(keys), size):
+        enqueue(purge_surrogate_keys, keys[start:start + size])
+
+
+def purge_enabled():
+    return bool(settings.EDGE_PURGE_URL)
+
+
+def purge(*keys):
+    """Сбрасывает в кэше прокси страницы с этими ключами.
+
+    Внутри batched_purge ключи копятся и уходят одним запросом
+    в конце, иначе — сразу после коммита транзакции.
+    """
+    if not purge_enabled():
+        return
+    pending = getattr(_local, 'pending', None)
+    if pending is not None:
+        pending.update(keys)
+    else:
+        transaction.on_commit(lambda: enqueue_purge(keys))
+
+
+@contextmanager
+def batched_purge():
+    """Копит ключи для сброса до выхода из блока."""
+    if getattr(_local, 'pending', None) is not None:
+        yield
+        return
+    _local.pending = set()
+    try:
+        yield
+    finally:
+        pending, _local.pending = _local.pending, None
+        if pending:
+            transaction.on_commit(lambda: enqueue_purge(pending))
@@ -0,0 +1,75 @@
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+SEQ_KEY = 'events:seq'
+
+
+def slot_key(seq):
+    return f'events:{seq % settings.EVENTS_BUFFER_SIZE}'
+
+
+def last_seq():
+    """Номер последнего события, с него клиент начинает слушать."""
+    return cache.get(SEQ_KEY, 0)
+
+
+def publish(channels, event_id):
+    """Кладёт event_id с его каналами в кольцевой буфер после коммита.
+
+    Буфер один на все каналы: EVENTS_BUFFER_SIZE ячеек в общем кэше и
+    номер последней записи, так что все процессы видят одни и те же
+    события, а публикация стоит одну запись при любом числе каналов.
+    """
+    def send():
+        cache.add(SEQ_KEY, 0, None)
+        seq = cache.incr(SEQ_KEY)
+        cache.set(
+            slot_key(seq), (seq, event_id, list(channels)),
+            settings.EVENTS_TIMEOUT
+        )
+    transaction.on_commit(send)
+
+
+def events_after(after):
+    """События с номером больше after и признак переполнения буфера.
+
+    События — пары (event_id, каналы). Читаются только ячейки новее
+    after, поэтому опрос без новых событий стоит одно чтение кэша.
+    Если после after записано больше EVENTS_BUFFER_SIZE событий,
+    старые уже вытеснены, и новых больше найденного.
+    """
+    seq = last_seq()
+    if seq <= after:
+        return [], False
+    size = settings.EVENTS_BUFFER_SIZE
+    found = cache.get_many([
+        slot_key(number) for number in range(max(after, seq - size) + 1,
+                                             seq + 1)
+    ])
+    events = [
+        (event_id, channels)
+        for number, event_id, channels in sorted(found.values())
+        if number > after
+    ]
+    return events, seq - after > size
+
+
+def sse_response(event=None, data=None):
+    """Короткий ответ Server-Sent Events.
+
+    Соединение не держится: сервер отдаёт текущее состояние и
+    закрывает поток, а EventSource переподключается через
+    EVENTS_RETRY миллисекунд. Тысячи открытых вкладок стоят
+    по запросу к кэшу раз в интервал, а не по воркеру на каждую.
+    """
+    body = f'retry: {settings.EVENTS_RETRY}\n\n'
+    if event is not None:
+        body += f'event: {event}\ndata: {json.dumps(data)}\n\n'
+    response = HttpResponse(body, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,100 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from core.paginator import CachedCountPaginator
+from posts.models import Post
+
+User = get_user_model()
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время рендера ленты из 10 постов с кэшем шаблонов '
+        'и без него, а также в Jinja2, если он установлен.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=200,
+            help='Сколько раз рендерить страницу.'
+        )
+        parser.add_argument(
+            '--template',
+            default='posts/index.html',
+            help='Какой шаблон рендерить.'
+        )
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        author = User(username='benchmark', first_name='Лев')
+        posts = [
+            Post(pk=number, author=author, text=f'Пост {number}',
+                 pub_date=timezone.now())
+            for number in range(1, settings.PAGE_POST + 1)
+        ]
+        context = {
+            'page_obj': CachedCountPaginator(
+                posts, settings.PAGE_POST
+            ).get_page(1),
+        }
+        results = {}
+        # фрагменты не кэшируются, чтобы каждый рендер был полным
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }}):
+            candidates = [
+                ('без кэша', self.engine(LOADERS)),
+                ('с кэшем', self.engine([
+                    ('django.template.loaders.cached.Loader', LOADERS),
+                ])),
+            ]
+            if 'jinja2' in engines.templates:
+                candidates.append(('Jinja2', engines['jinja2']))
+            for label, engine in candidates:
+                results[label] = self.measure(
+                    engine, options['template'], context, request,
+                    options['iterations']
+                )
+                self.stdout.write(f'{label}: {results[label]:.2f} мс')
+        for label in results:
+            if label != 'без кэша':
+                self.stdout.write(self.style.SUCCESS(
+                    f'Ускорение ({label}): '
+                    f'{results["без кэша"] / results[label]:.1f}×'
+                ))
+
+    def measure(self, engine, template_name, context, request, iterations):
+        """Среднее время рендера в миллисекундах."""
+        engine.get_template(template_name)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            engine.get_template(template_name).render(
+                dict(context), request
+            )
+        return (time.perf_counter() - start) / iterations * 1000
+
+    def engine(self, loaders):
+        config = settings.TEMPLATES[0]
+        return DjangoTemplates({
+            'NAME': 'benchmark',
+            'DIRS': config['DIRS'],
+            'APP_DIRS': False,
+            'OPTIONS': {**config['OPTIONS'], 'loaders': loaders},
+        })
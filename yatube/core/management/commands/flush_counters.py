@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.counters import flush_all
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит в базу накопленные в кэше прибавки счётчиков. '
+        'Обычно это делают задачи очереди, команда — для cron и деплоя.'
+    )
+
+    def handle(self, *args, **options):
+        for name, flushed in flush_all().items():
+            self.stdout.write(f'{name}: {flushed}')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.prerender import build
+
+
+class Command(BaseCommand):
+    help = (
+        'Сохраняет страницы, помеченные prerender, в PRERENDER_ROOT, '
+        'чтобы их отдавал прокси или PrerenderedPagesMiddleware.'
+    )
+
+    def handle(self, *args, **options):
+        pages = build()
+        for path, name in pages.items():
+            self.stdout.write(f'{path} → {name}')
+        self.stdout.write(self.style.SUCCESS(f'Страниц: {len(pages)}'))
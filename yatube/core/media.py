@@ -0,0 +1,182 @@
+import mimetypes
+import posixpath
+import re
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.files.storage import get_storage_class
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseRedirect)
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.functional import LazyObject
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+# имена картинок постов и миниатюр sorl содержат хэш содержимого
+HASHED_NAME = re.compile(r'(?:^|/)([0-9a-f]{32,})\.\w+$')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class MediaStorage(LazyObject):
+    def _setup(self):
+        self._wrapped = get_storage_class(settings.MEDIA_STORAGE_BACKEND)()
+
+
+media_storage = MediaStorage()
+
+
+def clean_name(name):
+    """Нормализованное имя файла или None, если оно ведёт за MEDIA_ROOT."""
+    name = posixpath.normpath(name).lstrip('/')
+    parts = name.split('/')
+    if any(part.startswith('.') for part in parts):
+        return None
+    return name
+
+
+def parse_range(header, size):
+    """Границы (start, end) из заголовка Range или None, если его нет.
+
+    Несколько диапазонов сразу не поддерживаются — тогда файл
+    отдаётся целиком, как разрешает RFC 7233.
+    """
+    match = RANGE.match(header or '')
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start > end:
+        raise ValueError(header)
+    return start, end
+
+
+class RangeFile:
+    """Файл, из которого читается только length байт с позиции start."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def cache_headers(name, size, modified):
+    """ETag и Cache-Control: файлы с хэшем в имени не меняются никогда."""
+    match = HASHED_NAME.search(name)
+    if match:
+        return quote_etag(match.group(1)), {
+            'public': True,
+            'max_age': settings.MEDIA_CACHE_MAX_AGE,
+            'immutable': True,
+        }
+    return quote_etag(f'{size:x}-{int(modified.timestamp()):x}'), {
+        'public': True,
+        'max_age': settings.MEDIA_CACHE_TIMEOUT,
+    }
+
+
+def local_path(name):
+    try:
+        return media_storage.path(name)
+    except NotImplementedError:
+        return None
+
+
+def sendfile(name, path):
+    """Пустой ответ, файл отдаёт фронтовой прокси."""
+    response = HttpResponse()
+    if settings.MEDIA_SENDFILE == 'nginx':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + name
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def stream(request, storage, name, size):
+    """Отдаёт файл из Django, с поддержкой запросов диапазонов."""
+    try:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    except ValueError:
+        response = HttpResponse(
+            status=HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    file = storage.open(name)
+    if byte_range is None:
+        response = FileResponse(file)
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeFile(file, start, end - start + 1))
+        response.status_code = HTTPStatus.PARTIAL_CONTENT
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def serve_file(request, storage, name, size, modified, etag,
+               cache_control, content_type=None, sendfile_path=None):
+    """Ответ с файлом из storage или 304, если у клиента он уже есть.
+
+    Если передан sendfile_path, байты отдаёт прокси.
+    """
+    response = get_conditional_response(
+        request, etag=etag, last_modified=modified.timestamp()
+    )
+    if response is None:
+        if sendfile_path is not None:
+            response = sendfile(name, sendfile_path)
+        else:
+            response = stream(request, storage, name, size)
+        if content_type is None:
+            content_type, encoding = mimetypes.guess_type(name)
+        response['Content-Type'] = (
+            content_type or 'application/octet-stream'
+        )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(modified.timestamp())
+    patch_cache_control(response, **cache_control)
+    return response
+
+
+@require_safe
+def serve_media(request, name):
+    """Картинки постов и миниатюры из MEDIA_STORAGE_BACKEND.
+
+    Django только проверяет имя и заголовки кэширования. Сами байты
+    отдаёт прокси через X-Accel-Redirect/X-Sendfile, если он настроен,
+    или хранилище по своей ссылке, если файлы лежат не на диске.
+    """
+    name = clean_name(name)
+    if name is None:
+        raise Http404
+    path = local_path(name)
+    if path is None:
+        return HttpResponseRedirect(media_storage.url(name))
+    try:
+        size = media_storage.size(name)
+        modified = media_storage.get_modified_time(name)
+    except FileNotFoundError:
+        raise Http404
+    etag, cache_control = cache_headers(name, size, modified)
+    return serve_file(
+        request, media_storage, name, size, modified, etag, cache_control,
+        sendfile_path=path if settings.MEDIA_SENDFILE else None
+    )
@@ -0,0 +1,198 @@
+import re
+import threading
+import time
+from collections import Counter
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .compression import choose_encoding, compress, compress_stream
+from .compression import compressible
+from .edge import batched_purge
+from .prerender import load_manifest
+from .prerender import storage as prerender_storage
+from .static import serve_precompressed
+
+
+class AdmissionController:
+    """Счётчики одновременных запросов процесса.
+
+    Часть общих слотов зарезервирована для запросов на запись.
+    """
+
+    def __init__(self, max_concurrent, reserved, queue_size):
+        self.max_concurrent = max_concurrent
+        self.reserved = reserved
+        self.queue_size = queue_size
+        self.condition = threading.Condition()
+        self.active = Counter()
+        self.waiting = Counter()
+        self.total = 0
+
+    def available(self, name, limit, write):
+        reserved = 0 if write else self.reserved
+        if self.total >= self.max_concurrent - reserved:
+            return False
+        return limit is None or self.active[name] < limit
+
+    def acquire(self, name, limit=None, write=False, timeout=0):
+        """Занимает слот, ожидая не дольше timeout секунд в очереди."""
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while not self.available(name, limit, write):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.waiting[name] >= self.queue_size:
+                    return False
+                self.waiting[name] += 1
+                self.condition.wait(remaining)
+                self.waiting[name] -= 1
+            self.active[name] += 1
+            self.total += 1
+            return True
+
+    def release(self, name):
+        with self.condition:
+            self.active[name] -= 1
+            self.total -= 1
+            self.condition.notify_all()
+
+
+class AdmissionControlMiddleware:
+    """Ограничивает число одновременных запросов к медленным страницам.
+
+    Когда лимит исчерпан, обычные запросы ждут в короткой очереди,
+    а роботы и дальние страницы пагинации сразу получают 503.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.controller = AdmissionController(
+            settings.ADMISSION_MAX_CONCURRENT,
+            settings.ADMISSION_RESERVED,
+            settings.ADMISSION_QUEUE_SIZE
+        )
+        self.crawler_re = re.compile(settings.ADMISSION_CRAWLER_RE, re.I)
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            name = getattr(request, '_admission_slot', None)
+            if name is not None:
+                self.controller.release(name)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        name = request.resolver_match.view_name
+        if self.controller.acquire(
+            name,
+            limit=settings.ADMISSION_VIEW_LIMITS.get(name),
+            write=self.is_write(request, name),
+            timeout=(
+                0 if self.is_low_priority(request)
+                else settings.ADMISSION_QUEUE_TIMEOUT
+            )
+        ):
+            request._admission_slot = name
+            return None
+        response = HttpResponse(
+            'Сервер перегружен, попробуйте позже.',
+            content_type='text/plain; charset=utf-8',
+            status=HTTPStatus.SERVICE_UNAVAILABLE
+        )
+        response['Retry-After'] = settings.ADMISSION_RETRY_AFTER
+        return response
+
+    def is_write(self, request, name):
+        return (
+            request.method == 'POST'
+            and name in settings.ADMISSION_WRITE_VIEWS
+            and request.user.is_authenticated
+        )
+
+    def is_low_priority(self, request):
+        if self.crawler_re.search(request.META.get('HTTP_USER_AGENT', '')):
+            return True
+        page = request.GET.get('page', '')
+        return page.isdigit() and int(page) > settings.ADMISSION_DEEP_PAGE
+
+
+class CompressionMiddleware:
+    """Сжимает ответы в brotli или gzip, что поддерживает клиент.
+
+    Потоковые ответы сжимаются по частям. Для страниц из кэша берётся
+    сжатый вариант, сохранённый вместе с ними (см. precompress).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request)
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        else:
+            compressed = getattr(response, 'compressed', {}).get(encoding)
+            if compressed is None:
+                compressed = compress(response.content, encoding, True)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag', '')
+        if etag.startswith('"'):
+            # сжатый ответ уже не совпадает байт в байт с исходным
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+class EdgePurgeMiddleware:
+    """Собирает сброс кэша прокси за весь запрос в одну пачку."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with batched_purge():
+            return self.get_response(request)
+
+
+class PrerenderedPagesMiddleware:
+    """Отдаёт страницы, сохранённые командой prerender, с диска.
+
+    Такой ответ не трогает сессию, базу и шаблоны. Страницы
+    читаются из манифеста при запуске, после prerender процесс
+    нужно перезапустить.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pages = load_manifest()
+        if not self.pages:
+            raise MiddlewareNotUsed
+        self.storage = prerender_storage()
+
+    def __call__(self, request):
+        name = self.pages.get(request.path_info)
+        if (name is None or request.method not in ('GET', 'HEAD')
+                or request.GET):
+            return self.get_response(request)
+        try:
+            return serve_precompressed(
+                request, self.storage, name,
+                {'public': True, 'max_age': settings.PRERENDER_CACHE_TIMEOUT}
+            )
+        except Http404:
+            return self.get_response(request)
@@ -0,0 +1,131 @@
+import hashlib
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.paginator import InvalidPage, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .cache import single_flight
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор, который берёт общее число объектов из кэша.
+
+    Ключ кэша можно передать явно, иначе он строится по SQL запроса.
+    Если передан count_func, число объектов берётся из него.
+    """
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, cache_key=None,
+                 count_func=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+        self.count_func = count_func
+
+    def get_count_cache_key(self):
+        if self.cache_key is not None:
+            return self.cache_key
+        query = getattr(self.object_list, 'query', None)
+        if query is None:
+            return None
+        sql, params = query.sql_with_params()
+        digest = hashlib.md5(f'{sql}{params}'.encode()).hexdigest()
+        return f'paginator_count:{digest}'
+
+    @cached_property
+    def count(self):
+        if self.count_func is not None:
+            return self.count_func()
+        key = self.get_count_cache_key()
+        if key is None:
+            return super().count
+        return single_flight(
+            key,
+            lambda: super(CachedCountPaginator, self).count,
+            settings.PAGINATOR_COUNT_TIMEOUT
+        )
+
+    def page(self, number):
+        # Границы страницы не обрезаются по count: кэшированное значение
+        # может немного отставать, а лишний срез базе ничего не стоит.
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        return self._get_page(self.object_list[bottom:top], number, self)
+
+    def get_elided_page_range(self, number=1, on_each_side=2, on_ends=1):
+        """Номера страниц вокруг текущей и по краям, пропуски — ELLIPSIS."""
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > (1 + on_each_side + on_ends) + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < (self.num_pages - on_each_side - on_ends) - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1,
+                             self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
+
+def encode_cursor(obj, field='pub_date'):
+    """Курсор после obj: время field в микросекундах и pk."""
+    value = getattr(obj, field)
+    micros = int(value.timestamp()) * 10 ** 6 + value.microsecond
+    return f'{micros}.{obj.pk}'
+
+
+def decode_cursor(cursor):
+    try:
+        micros, pk = (int(part) for part in cursor.split('.'))
+        value = datetime.fromtimestamp(
+            micros // 10 ** 6, tz=timezone.utc
+        ).replace(microsecond=micros % 10 ** 6)
+    except (ValueError, OverflowError, OSError):
+        raise InvalidPage('Неверный курсор.')
+    return value, pk
+
+
+class CursorPage(list):
+    """Порция объектов и курсор следующей порции (None — это последняя)."""
+
+    def __init__(self, objects, next_cursor):
+        super().__init__(objects)
+        self.next_cursor = next_cursor
+
+
+class CursorPaginator:
+    """Порции по курсору: объекты старше последнего показанного.
+
+    В отличие от номеров страниц, не нужны ни COUNT, ни OFFSET,
+    а порция для одного курсора не сдвигается от новых постов,
+    поэтому её можно кэшировать.
+    """
+
+    def __init__(self, object_list, per_page, field='pub_date'):
+        self.object_list = object_list.order_by(f'-{field}', '-pk')
+        self.per_page = per_page
+        self.field = field
+
+    def page(self, cursor=None):
+        objects = self.object_list
+        if cursor:
+            value, pk = decode_cursor(cursor)
+            objects = objects.filter(
+                Q(**{f'{self.field}__lt': value})
+                | Q(**{self.field: value, 'pk__lt': pk})
+            )
+        # лишний объект показывает, есть ли следующая порция
+        objects = list(objects[:self.per_page + 1])
+        next_cursor = None
+        if len(objects) > self.per_page:
+            objects = objects[:self.per_page]
+            next_cursor = encode_cursor(objects[-1], self.field)
+        return CursorPage(objects, next_cursor)
@@ -0,0 +1,92 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import RequestFactory
+from django.urls import (URLPattern, URLResolver, get_resolver, resolve,
+                         reverse)
+
+from .compression import SUFFIXES, available_encodings, compress
+
+MANIFEST = 'prerendered.json'
+
+
+def prerender(view):
+    """Помечает страницу как неизменную.
+
+    Команда prerender сохраняет такие страницы в PRERENDER_ROOT,
+    а блок пользователя в шапке подгружается отдельным фрагментом.
+    """
+    view.prerender = True
+    return view
+
+
+def prerendered_paths(patterns=None, namespace=None):
+    """Пути страниц без параметров, помеченных prerender."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            name = pattern.namespace
+            if namespace and name:
+                name = f'{namespace}:{name}'
+            yield from prerendered_paths(
+                pattern.url_patterns, name or namespace
+            )
+        elif (isinstance(pattern, URLPattern) and pattern.name
+              and getattr(pattern.callback, 'prerender', False)
+              and not pattern.pattern.regex.groups):
+            name = pattern.name
+            if namespace:
+                name = f'{namespace}:{name}'
+            yield reverse(name)
+
+
+def render_page(path):
+    """HTML страницы, как её видит аноним, без middleware и сессии."""
+    request = RequestFactory().get(path)
+    request.user = AnonymousUser()
+    request.prerendering = True
+    request.resolver_match = match = resolve(path)
+    response = match.func(request, *match.args, **match.kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response.content
+
+
+def page_name(path):
+    """Файл страницы в PRERENDER_ROOT: /about/tech/ → about/tech/index.html"""
+    return f'{path.strip("/")}/index.html'.lstrip('/')
+
+
+def storage():
+    return FileSystemStorage(location=settings.PRERENDER_ROOT)
+
+
+def build():
+    """Сохраняет все помеченные страницы и их сжатые варианты."""
+    pages = {}
+    target = storage()
+    for path in prerendered_paths():
+        name = page_name(path)
+        content = render_page(path)
+        variants = {name: content}
+        for encoding in available_encodings():
+            variants[name + SUFFIXES[encoding]] = compress(content, encoding)
+        for variant, data in variants.items():
+            target.delete(variant)
+            target.save(variant, ContentFile(data))
+        pages[path] = name
+    target.delete(MANIFEST)
+    target.save(MANIFEST, ContentFile(json.dumps(pages, indent=2)))
+    return pages
+
+
+def load_manifest():
+    try:
+        with open(storage().path(MANIFEST)) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
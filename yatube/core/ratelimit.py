@@ -0,0 +1,107 @@
+import math
+import time
+from functools import wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60)."""
+    limit, period = rate.split('/')
+    return int(limit), PERIODS[period]
+
+
+def client_ip(request):
+    """Адрес клиента с учётом доверенного обратного прокси.
+
+    Прокси дописывает адрес клиента в конец заголовка
+    RATELIMIT_TRUSTED_PROXY_HEADER, поэтому берётся
+    RATELIMIT_TRUSTED_PROXY_COUNT-й адрес с конца: те, что левее,
+    мог подставить сам клиент.
+    """
+    header = settings.RATELIMIT_TRUSTED_PROXY_HEADER
+    if header:
+        count = settings.RATELIMIT_TRUSTED_PROXY_COUNT
+        addresses = [
+            address.strip()
+            for address in request.META.get(header, '').split(',')
+            if address.strip()
+        ]
+        if len(addresses) >= count:
+            return addresses[-count]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def get_ident(request, key):
+    if key == 'ip':
+        return f'ip:{client_ip(request)}'
+    if key == 'user' or request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{client_ip(request)}'
+
+
+def hit(key, limit, period):
+    """Учитывает запрос в скользящем окне.
+
+    Окно приближается двумя соседними счётчиками в кэше: текущим и
+    предыдущим, взвешенным по оставшейся доле периода.
+    Возвращает (разрешён ли запрос, остаток, секунд до сброса).
+    """
+    now = time.time()
+    window = int(now // period)
+    current_key = f'ratelimit:{key}:{window}'
+    cache.add(current_key, 0, period * 2)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:
+        # ключ успел истечь между add и incr
+        cache.set(current_key, 1, period * 2)
+        current = 1
+    previous = cache.get(f'ratelimit:{key}:{window - 1}', 0)
+    elapsed = now - window * period
+    count = previous * (period - elapsed) / period + current
+    retry_after = math.ceil(period - elapsed)
+    return count <= limit, max(0, limit - math.ceil(count)), retry_after
+
+
+def ratelimit(scope, key='user_or_ip', methods=('POST',)):
+    """Ограничивает частоту запросов к view.
+
+    Лимит берётся из settings.RATELIMITS[scope], key задаёт, кого
+    считать: 'ip', 'user' или 'user_or_ip'. methods=None — все методы.
+    Подходит и для функций, и для результата as_view().
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            rate = settings.RATELIMITS.get(scope)
+            if (
+                not settings.RATELIMIT_ENABLE
+                or rate is None
+                or (methods is not None and request.method not in methods)
+            ):
+                return view_func(request, *args, **kwargs)
+            limit, period = parse_rate(rate)
+            allowed, remaining, retry_after = hit(
+                f'{scope}:{get_ident(request, key)}', limit, period
+            )
+            if allowed:
+                response = view_func(request, *args, **kwargs)
+            else:
+                response = HttpResponse(
+                    'Слишком много запросов, попробуйте позже.',
+                    content_type='text/plain; charset=utf-8',
+                    status=HTTPStatus.TOO_MANY_REQUESTS
+                )
+                response['Retry-After'] = retry_after
+            response['X-RateLimit-Limit'] = limit
+            response['X-RateLimit-Remaining'] = remaining
+            response['X-RateLimit-Reset'] = retry_after
+            return response
+        return wrapper
+    return decorator
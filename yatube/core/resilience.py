@@ -0,0 +1,98 @@
+import hashlib
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from django.utils.cache import add_never_cache_headers
+
+STALE_BANNER = (
+    '<div class="alert alert-warning text-center mb-0" role="alert">'
+    'Сайт временно работает с задержками, показана сохранённая копия '
+    'страницы.</div>'
+)
+
+
+@contextmanager
+def statement_timeout(seconds, using='default'):
+    """Ограничивает время запросов к базе внутри блока.
+
+    На Postgres выставляется statement_timeout сессии, на SQLite запрос
+    прерывается из progress handler.
+    """
+    connection = connections[using]
+    connection.ensure_connection()
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SET statement_timeout = %s', [int(seconds * 1000)]
+            )
+        try:
+            yield
+        finally:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET statement_timeout = DEFAULT')
+            except DatabaseError:
+                pass
+    elif connection.vendor == 'sqlite':
+        deadline = time.monotonic() + seconds
+        connection.connection.set_progress_handler(
+            lambda: time.monotonic() > deadline,
+            settings.SQLITE_PROGRESS_STEPS
+        )
+        try:
+            yield
+        finally:
+            connection.connection.set_progress_handler(None, 0)
+    else:
+        yield
+
+
+def mark_stale(response):
+    add_never_cache_headers(response)
+    response['Warning'] = '110 - "Response is Stale"'
+    response['X-Stale-If-Error'] = '1'
+    response.content = response.content.replace(
+        b'<body>', b'<body>' + STALE_BANNER.encode(), 1
+    )
+    # сжатые варианты из кэша страниц собраны без плашки
+    response.__dict__.pop('compressed', None)
+    return response
+
+
+def stale_if_error(view_func):
+    """Отдаёт сохранённую копию страницы, если база не ответила.
+
+    Копия успешного ответа анонимному пользователю обновляется не чаще
+    раза в STALE_IF_ERROR_REFRESH секунд и хранится
+    STALE_IF_ERROR_TIMEOUT секунд. Запросы к базе ограничены
+    DB_STATEMENT_TIMEOUT секундами.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return view_func(request, *args, **kwargs)
+        url = request.build_absolute_uri().encode()
+        key = f'stale:{hashlib.md5(url).hexdigest()}'
+        try:
+            with statement_timeout(settings.DB_STATEMENT_TIMEOUT):
+                response = view_func(request, *args, **kwargs)
+                anonymous = not request.user.is_authenticated
+        except DatabaseError:
+            stale = cache.get(key)
+            if stale is None:
+                raise
+            return mark_stale(stale)
+        if (
+            anonymous
+            and response.status_code == 200
+            and cache.add(
+                f'{key}:fresh', 1, settings.STALE_IF_ERROR_REFRESH
+            )
+        ):
+            cache.set(key, response, settings.STALE_IF_ERROR_TIMEOUT)
+        return response
+    return wrapper
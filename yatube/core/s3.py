@@ -0,0 +1,298 @@
+"""Хранилище файлов в S3-совместимом объектном хранилище.
+
+Запросы подписываются AWS Signature V4 и идут через пул соединений
+requests. Бакет адресуется через путь (endpoint/bucket/key), как это
+поддерживают MinIO и другие S3-совместимые серверы.
+"""
+import hashlib
+import hmac
+import io
+import mimetypes
+import posixpath
+import xml.etree.ElementTree as ElementTree
+from datetime import datetime, timezone as dt_timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote, urlsplit
+
+import requests
+from django.conf import settings
+from django.core.files.base import File
+from django.core.files.storage import Storage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+from requests.adapters import HTTPAdapter
+
+ALGORITHM = 'AWS4-HMAC-SHA256'
+UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
+S3_NAMESPACE = '{http://s3.amazonaws.com/doc/2006-03-01/}'
+
+
+def uri_encode(value, safe='-_.~'):
+    return quote(value, safe=safe)
+
+
+def canonical_query(query):
+    return '&'.join(
+        f'{uri_encode(key)}={uri_encode(str(value))}'
+        for key, value in sorted(query.items())
+    )
+
+
+def signing_key(secret_key, date, region):
+    key = f'AWS4{secret_key}'.encode()
+    for part in (date, region, 's3', 'aws4_request'):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    return key
+
+
+def signature(secret_key, region, now, method, path, query, headers):
+    """Подпись AWS Signature V4 для запроса к S3."""
+    amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+    date = now.strftime('%Y%m%d')
+    signed_headers = ';'.join(sorted(headers))
+    canonical_headers = ''.join(
+        f'{name}:{headers[name].strip()}\n' for name in sorted(headers)
+    )
+    canonical_request = '\n'.join([
+        method,
+        uri_encode(path, safe='/-_.~'),
+        canonical_query(query),
+        canonical_headers,
+        signed_headers,
+        headers.get('x-amz-content-sha256', UNSIGNED_PAYLOAD),
+    ])
+    string_to_sign = '\n'.join([
+        ALGORITHM,
+        amz_date,
+        f'{date}/{region}/s3/aws4_request',
+        hashlib.sha256(canonical_request.encode()).hexdigest(),
+    ])
+    return hmac.new(
+        signing_key(secret_key, date, region),
+        string_to_sign.encode(),
+        hashlib.sha256
+    ).hexdigest()
+
+
+def presign(access_key, secret_key, region, now, method, host, path,
+            expires):
+    """Query-параметры подписанной ссылки на объект."""
+    query = {
+        'X-Amz-Algorithm': ALGORITHM,
+        'X-Amz-Credential': (
+            f'{access_key}/{now:%Y%m%d}/{region}/s3/aws4_request'
+        ),
+        'X-Amz-Date': now.strftime('%Y%m%dT%H%M%SZ'),
+        'X-Amz-Expires': expires,
+        'X-Amz-SignedHeaders': 'host',
+    }
+    query['X-Amz-Signature'] = signature(
+        secret_key, region, now, method, path, query, {'host': host}
+    )
+    return query
+
+
+@deconstructible
+class S3Storage(Storage):
+    """Django Storage поверх S3 API.
+
+    Настройки берутся из settings.S3_STORAGE, их можно переопределить
+    аргументами конструктора. Файлы больше MULTIPART_THRESHOLD
+    загружаются частями, url() отдаёт подписанную ссылку, так что
+    картинки скачиваются напрямую из хранилища, минуя Django.
+    """
+
+    def __init__(self, **options):
+        self.options = options
+        config = {**settings.S3_STORAGE, **options}
+        self.endpoint_url = config['ENDPOINT_URL'].rstrip('/')
+        self.host = urlsplit(self.endpoint_url).netloc
+        self.bucket = config['BUCKET']
+        self.access_key = config['ACCESS_KEY']
+        self.secret_key = config['SECRET_KEY']
+        self.region = config['REGION']
+        self.url_expire = config['URL_EXPIRE']
+        self.multipart_threshold = config['MULTIPART_THRESHOLD']
+        self.multipart_chunk_size = config['MULTIPART_CHUNK_SIZE']
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=config['MAX_POOL_CONNECTIONS']
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def object_path(self, name=''):
+        path = f'/{self.bucket}'
+        if name:
+            path += '/' + name.lstrip('/')
+        return path
+
+    def request(self, method, name='', query=None, headers=None, data=None,
+                allow_404=False):
+        query = query or {}
+        path = self.object_path(name)
+        now = datetime.now(dt_timezone.utc)
+        signed = {
+            'host': self.host,
+            'x-amz-content-sha256': UNSIGNED_PAYLOAD,
+            'x-amz-date': now.strftime('%Y%m%dT%H%M%SZ'),
+        }
+        for header, value in (headers or {}).items():
+            signed[header.lower()] = value
+        sign = signature(
+            self.secret_key, self.region, now, method, path, query, signed
+        )
+        signed['authorization'] = (
+            f'{ALGORITHM} Credential={self.access_key}/{now:%Y%m%d}/'
+            f'{self.region}/s3/aws4_request, '
+            f'SignedHeaders={";".join(sorted(signed))}, '
+            f'Signature={sign}'
+        )
+        del signed['host']
+        url = self.endpoint_url + uri_encode(path, safe='/-_.~')
+        if query:
+            url += '?' + canonical_query(query)
+        response = self.session.request(
+            method, url, headers=signed, data=data
+        )
+        if allow_404 and response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response
+
+    def _open(self, name, mode='rb'):
+        response = self.request('GET', name)
+        file = File(io.BytesIO(response.content), name)
+        file.mode = mode
+        return file
+
+    def content_type(self, name):
+        content_type = mimetypes.guess_type(name)[0]
+        return {'content-type': content_type or 'application/octet-stream'}
+
+    def _save(self, name, content):
+        content.seek(0)
+        if content.size > self.multipart_threshold:
+            self.multipart_upload(name, content)
+        else:
+            self.request(
+                'PUT',
+                name,
+                headers=self.content_type(name),
+                data=content.read()
+            )
+        return name
+
+    def multipart_upload(self, name, content):
+        response = self.request(
+            'POST',
+            name,
+            query={'uploads': ''},
+            headers=self.content_type(name)
+        )
+        upload_id = ElementTree.fromstring(response.content).findtext(
+            f'{S3_NAMESPACE}UploadId'
+        )
+        parts = []
+        try:
+            for number, chunk in enumerate(
+                content.chunks(self.multipart_chunk_size), 1
+            ):
+                response = self.request(
+                    'PUT',
+                    name,
+                    query={'partNumber': number, 'uploadId': upload_id},
+                    data=chunk
+                )
+                parts.append((number, response.headers['ETag']))
+            body = ''.join(
+                f'<Part><PartNumber>{number}</PartNumber>'
+                f'<ETag>{etag}</ETag></Part>'
+                for number, etag in parts
+            )
+            self.request(
+                'POST',
+                name,
+                query={'uploadId': upload_id},
+                data=(
+                    f'<CompleteMultipartUpload>{body}'
+                    f'</CompleteMultipartUpload>'
+                ).encode()
+            )
+        except requests.RequestException:
+            self.request('DELETE', name, query={'uploadId': upload_id})
+            raise
+
+    def head(self, name):
+        return self.request('HEAD', name, allow_404=True)
+
+    def exists(self, name):
+        return self.head(name) is not None
+
+    def delete(self, name):
+        self.request('DELETE', name, allow_404=True)
+
+    def size(self, name):
+        return int(self.request('HEAD', name).headers['Content-Length'])
+
+    def get_modified_time(self, name):
+        modified = parsedate_to_datetime(
+            self.request('HEAD', name).headers['Last-Modified']
+        )
+        if settings.USE_TZ:
+            return modified
+        return timezone.make_naive(modified)
+
+    def touch(self, name):
+        """Обновляет время изменения объекта копированием в себя.
+
+        S3 копирует объект в себя только с REPLACE, а тогда метаданные
+        берутся из запроса. Content-Type зависит только от имени, как
+        в _save, иначе S3 заменит его на binary/octet-stream.
+        """
+        self.request('PUT', name, headers={
+            'x-amz-copy-source': quote(self.object_path(name)),
+            'x-amz-metadata-directive': 'REPLACE',
+            **self.content_type(name),
+        })
+
+    def listdir(self, path):
+        prefix = path.strip('/')
+        prefix = f'{prefix}/' if prefix else ''
+        directories, files = [], []
+        query = {'list-type': 2, 'prefix': prefix, 'delimiter': '/'}
+        while True:
+            tree = ElementTree.fromstring(
+                self.request('GET', query=query).content
+            )
+            directories += [
+                posixpath.basename(
+                    element.findtext(f'{S3_NAMESPACE}Prefix').rstrip('/')
+                )
+                for element in tree.iter(f'{S3_NAMESPACE}CommonPrefixes')
+            ]
+            files += [
+                posixpath.basename(element.findtext(f'{S3_NAMESPACE}Key'))
+                for element in tree.iter(f'{S3_NAMESPACE}Contents')
+            ]
+            token = tree.findtext(f'{S3_NAMESPACE}NextContinuationToken')
+            if not token:
+                return directories, files
+            query['continuation-token'] = token
+
+    def url(self, name):
+        # время подписи округляется до часа, чтобы ссылка не менялась
+        # от запроса к запросу и страницы с ней можно было кэшировать
+        now = datetime.now(dt_timezone.utc).replace(
+            minute=0, second=0, microsecond=0
+        )
+        path = self.object_path(name)
+        query = presign(
+            self.access_key, self.secret_key, self.region, now, 'GET',
+            self.host, path, self.url_expire
+        )
+        return (
+            f'{self.endpoint_url}{uri_encode(path, safe="/-_.~")}?'
+            f'{canonical_query(query)}'
+        )
@@ -0,0 +1,126 @@
+import mimetypes
+import re
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (ManifestStaticFilesStorage,
+                                                staticfiles_storage)
+from django.core.files.base import ContentFile
+from django.http import Http404
+from django.utils.cache import patch_vary_headers
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_safe
+
+from .compression import (COMPRESSIBLE_EXTENSIONS, SUFFIXES,
+                          available_encodings, choose_encoding, compress)
+from .media import clean_name, serve_file
+
+# ManifestStaticFilesStorage добавляет в имя 12 символов md5
+HASHED_NAME = re.compile(r'\.([0-9a-f]{12})\.\w+$')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хэшем в имени и готовыми .gz и .br рядом.
+
+    Сжатые варианты пишет collectstatic, поэтому при запросе
+    сжимать уже ничего не нужно. При разработке, пока collectstatic
+    не запускался, ссылки ведут на файлы без хэша. С
+    STATIC_MANIFEST_STRICT файл без записи в манифесте — ошибка:
+    ссылка без хэша получила бы вечное кэширование.
+    """
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if settings.STATIC_MANIFEST_STRICT:
+                raise
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            for compressed_name in self.write_compressed(name):
+                yield name, compressed_name, True
+
+    def write_compressed(self, name):
+        with self.open(name) as file:
+            data = file.read()
+        if len(data) < settings.STATIC_COMPRESS_MIN_SIZE:
+            return
+        for encoding in available_encodings():
+            compressed = compress(data, encoding)
+            if len(compressed) >= len(data):
+                continue
+            compressed_name = name + SUFFIXES[encoding]
+            self.delete(compressed_name)
+            self._save(compressed_name, ContentFile(compressed))
+            yield compressed_name
+
+
+def serve_precompressed(request, storage, name, cache_control,
+                        version=None):
+    """Файл из storage, а если клиент поддерживает — его .br или .gz.
+
+    ETag строится из version или из размера и времени изменения.
+    """
+    served, encoding = name, None
+    if name.endswith(COMPRESSIBLE_EXTENSIONS):
+        encoding = choose_encoding(request, [
+            encoding for encoding, suffix in SUFFIXES.items()
+            if storage.exists(name + suffix)
+        ])
+        if encoding is not None:
+            served = name + SUFFIXES[encoding]
+    try:
+        size = storage.size(served)
+        modified = storage.get_modified_time(served)
+    except FileNotFoundError:
+        raise Http404
+    if version is None:
+        version = f'{size:x}-{int(modified.timestamp()):x}'
+    if encoding is not None:
+        version = f'{version}-{encoding}'
+    content_type, _ = mimetypes.guess_type(name)
+    response = serve_file(
+        request, storage, served, size, modified, quote_etag(version),
+        cache_control, content_type=content_type
+    )
+    not_modified = response.status_code == HTTPStatus.NOT_MODIFIED
+    if encoding is not None and not not_modified:
+        response['Content-Encoding'] = encoding
+    if name.endswith(COMPRESSIBLE_EXTENSIONS):
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+@require_safe
+def serve_static(request, name):
+    """Статика из STATIC_ROOT, если перед Django нет прокси.
+
+    Клиенту отдаётся готовый сжатый вариант файла, файлы с хэшем
+    в имени кэшируются навсегда.
+    """
+    name = clean_name(name)
+    if name is None:
+        raise Http404
+    match = HASHED_NAME.search(name)
+    if match is None:
+        return serve_precompressed(
+            request, staticfiles_storage, name,
+            {'public': True, 'max_age': settings.STATIC_CACHE_TIMEOUT}
+        )
+    return serve_precompressed(
+        request, staticfiles_storage, name,
+        {
+            'public': True,
+            'max_age': settings.STATIC_CACHE_MAX_AGE,
+            'immutable': True,
+        },
+        version=match.group(1)
+    )
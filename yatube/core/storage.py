@@ -0,0 +1,89 @@
+import hashlib
+import os
+import posixpath
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import Storage, get_storage_class
+from django.utils.deconstruct import deconstructible
+from django.utils.functional import cached_property
+
+
+def content_name(name, content):
+    """Имя файла по sha256 содержимого: <папка>/ab/abcdef….ext
+
+    Хэш, уже посчитанный при загрузке, берётся из content.sha256.
+    """
+    digest = getattr(content, 'sha256', None)
+    if digest is None:
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+    dirname, filename = posixpath.split(name)
+    extension = os.path.splitext(filename)[1].lower()
+    return posixpath.join(dirname, digest[:2], digest + extension)
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+    """Хранилище, где одинаковые файлы лежат один раз.
+
+    Имя файла — хэш содержимого, поэтому повторная загрузка того же
+    файла возвращает уже сохранённое имя. Ссылки считаются по базе,
+    осиротевшие файлы удаляет команда collect_images. Сами файлы
+    хранит backend, по умолчанию settings.MEDIA_STORAGE_BACKEND.
+    """
+
+    def __init__(self, backend=None):
+        self.backend_path = backend
+
+    @cached_property
+    def backend(self):
+        return get_storage_class(
+            self.backend_path or settings.MEDIA_STORAGE_BACKEND
+        )()
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = content_name(name, content)
+        if self.backend.exists(name):
+            # свежее время изменения защищает файл от сборщика мусора,
+            # пока новая ссылка на него не сохранена в базе
+            self.touch(name)
+            return name
+        return self.backend._save(name, content)
+
+    def touch(self, name):
+        if hasattr(self.backend, 'touch'):
+            self.backend.touch(name)
+        else:
+            os.utime(self.backend.path(name))
+
+    def _open(self, name, mode='rb'):
+        return self.backend._open(name, mode)
+
+    def delete(self, name):
+        self.backend.delete(name)
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def listdir(self, path):
+        return self.backend.listdir(path)
+
+    def size(self, name):
+        return self.backend.size(name)
+
+    def url(self, name):
+        return self.backend.url(name)
+
+    def path(self, name):
+        return self.backend.path(name)
+
+    def get_modified_time(self, name):
+        return self.backend.get_modified_time(name)
@@ -0,0 +1,29 @@
+import requests
+from django.conf import settings
+
+from jobs.queue import task
+
+
+@task
+def purge_surrogate_keys(keys):
+    """Одним запросом сбрасывает в прокси страницы с этими ключами.
+
+    При ошибке задача повторяется очередью.
+    """
+    headers = {'Surrogate-Key': ' '.join(keys)}
+    if settings.EDGE_PURGE_TOKEN:
+        headers['Authorization'] = f'Bearer {settings.EDGE_PURGE_TOKEN}'
+    response = requests.post(
+        settings.EDGE_PURGE_URL,
+        json={'surrogate_keys': keys},
+        headers=headers,
+        timeout=settings.EDGE_PURGE_TIMEOUT
+    )
+    response.raise_for_status()
+
+
+@task
+def flush_counter(name):
+    """Переносит в базу прибавки BufferedCounter с этим именем."""
+    from .counters import get_counter
+    get_counter(name).flush()
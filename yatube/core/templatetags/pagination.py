@@ -0,0 +1,22 @@
+from django import template
+
+from ..paginator import encode_cursor
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def elided_page_range(page_obj):
+    paginator = page_obj.paginator
+    if hasattr(paginator, 'get_elided_page_range'):
+        return list(paginator.get_elided_page_range(page_obj.number))
+    return paginator.page_range
+
+
+@register.simple_tag
+def next_cursor(page_obj):
+    """Курсор порции, которая идёт после страницы page_obj."""
+    if not len(page_obj):
+        return ''
+    return encode_cursor(page_obj[len(page_obj) - 1])
@@ -0,0 +1,53 @@
+import os
+
+from django.conf import settings
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.cached import Loader as CachedLoader
+
+
+def uses_cached_loader(engine):
+    return any(
+        isinstance(loader, CachedLoader)
+        for loader in engine.engine.template_loaders
+    )
+
+
+def template_names(directory):
+    """Имена всех .html шаблонов в папке, относительно неё."""
+    for root, dirs, files in os.walk(directory):
+        for filename in files:
+            if filename.endswith('.html'):
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, directory).replace(os.sep, '/')
+
+
+def precompile_templates():
+    """Загружает в кэш загрузчика все шаблоны из DIRS.
+
+    Вызывается при старте воркера, чтобы первые запросы не
+    разбирали шаблоны с диска. Без кэширующего загрузчика
+    (DEBUG = True) ничего не делает. Возвращает число шаблонов.
+    """
+    loaded = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        if not uses_cached_loader(engine):
+            continue
+        for directory in engine.engine.dirs:
+            for name in template_names(directory):
+                engine.get_template(name)
+                loaded += 1
+    return loaded
+
+
+def template_engine(request):
+    """Имя шаблонизатора для страницы: 'jinja2' для видов из
+    JINJA2_VIEWS, если Jinja2 установлен, иначе None (Django)."""
+    match = request.resolver_match
+    if match is None or match.view_name not in settings.JINJA2_VIEWS:
+        return None
+    if 'jinja2' not in engines.templates:
+        return None
+    return 'jinja2'
@@ -0,0 +1,89 @@
+"""Кэширующий прокси для тестов, вместо Varnish или CDN.
+
+Кэширует публичные ответы на GET по s-maxage и сбрасывает их
+по Surrogate-Key, присланным POST-запросом на /purge.
+"""
+import json
+import re
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+S_MAXAGE = re.compile(r's-maxage=(\d+)')
+HOP_HEADERS = {'connection', 'transfer-encoding', 'content-length'}
+
+
+class EdgeHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, body, headers, cache_status):
+        self.send_response(status)
+        for name, value in headers.items():
+            if name.lower() not in HOP_HEADERS:
+                self.send_header(name, value)
+        self.send_header('X-Cache', cache_status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        cache = self.server.cache
+        entry = cache.get(self.path)
+        anonymous = 'Cookie' not in self.headers
+        if anonymous and entry is not None:
+            status, headers, body, keys, expires = entry
+            if time.time() < expires:
+                return self.reply(status, body, headers, 'HIT')
+        upstream = requests.get(
+            self.server.upstream + self.path,
+            headers={'Cookie': self.headers.get('Cookie', '')},
+            allow_redirects=False
+        )
+        headers = dict(upstream.headers)
+        headers.pop('Content-Encoding', None)
+        cache_control = headers.get('Cache-Control', '')
+        match = S_MAXAGE.search(cache_control)
+        if anonymous and match and 'public' in cache_control:
+            cache[self.path] = (
+                upstream.status_code,
+                headers,
+                upstream.content,
+                set(headers.get('Surrogate-Key', '').split()),
+                time.time() + int(match.group(1))
+            )
+        self.reply(upstream.status_code, upstream.content, headers, 'MISS')
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        keys = set(json.loads(body)['surrogate_keys'])
+        self.server.purges.append(sorted(keys))
+        for path, entry in list(self.server.cache.items()):
+            if entry[3] & keys:
+                del self.server.cache[path]
+        self.reply(HTTPStatus.OK, b'', {}, 'PURGE')
+
+
+class EdgeProxy(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, upstream):
+        super().__init__(('127.0.0.1', 0), EdgeHandler)
+        self.upstream = upstream
+        self.cache = {}
+        self.purges = []
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,204 @@
+"""Минимальный S3-совместимый сервер для тестов, вместо MinIO.
+
+Хранит объекты в памяти и понимает только те запросы, которые
+делает core.s3.S3Storage. Подписи не проверяются, только их наличие.
+"""
+import threading
+import time
+import uuid
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+NAMESPACE = 'http://s3.amazonaws.com/doc/2006-03-01/'
+
+
+class S3Handler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def parse(self):
+        url = urlsplit(self.path)
+        bucket, _, key = unquote(url.path).lstrip('/').partition('/')
+        query = {
+            name: values[0]
+            for name, values in parse_qs(
+                url.query, keep_blank_values=True
+            ).items()
+        }
+        return key, query
+
+    def authorized(self, query):
+        if 'Authorization' in self.headers or 'X-Amz-Signature' in query:
+            return True
+        self.reply(HTTPStatus.FORBIDDEN)
+        return False
+
+    def body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def reply(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def xml(self, root, content):
+        return (
+            f'<?xml version="1.0" encoding="UTF-8"?>'
+            f'<{root} xmlns="{NAMESPACE}">{content}</{root}>'
+        ).encode()
+
+    def object_headers(self, key):
+        data, content_type, modified = self.server.objects[key]
+        return {
+            'Content-Type': content_type,
+            'Last-Modified': formatdate(modified, usegmt=True),
+            'ETag': f'"{len(data)}-{modified}"',
+        }
+
+    def do_PUT(self):
+        key, query = self.parse()
+        if not self.authorized(query):
+            return
+        objects = self.server.objects
+        if 'partNumber' in query:
+            parts = self.server.uploads[query['uploadId']]
+            parts[int(query['partNumber'])] = self.body()
+            etag = f'"part-{query["partNumber"]}"'
+            return self.reply(HTTPStatus.OK, headers={'ETag': etag})
+        source = self.headers.get('x-amz-copy-source')
+        if source:
+            _, _, source_key = unquote(source).lstrip('/').partition('/')
+            data, content_type, _ = objects[source_key]
+            if self.headers.get('x-amz-metadata-directive') == 'REPLACE':
+                # как в S3: метаданные копии берутся из запроса
+                content_type = self.headers.get(
+                    'Content-Type', 'binary/octet-stream'
+                )
+            objects[key] = (data, content_type, time.time())
+            return self.reply(
+                HTTPStatus.OK, self.xml('CopyObjectResult', '')
+            )
+        objects[key] = (
+            self.body(),
+            self.headers.get('Content-Type', 'binary/octet-stream'),
+            time.time()
+        )
+        self.reply(HTTPStatus.OK, headers=self.object_headers(key))
+
+    def do_POST(self):
+        key, query = self.parse()
+        if not self.authorized(query):
+            return
+        if 'uploads' in query:
+            upload_id = uuid.uuid4().hex
+            self.server.uploads[upload_id] = {}
+            self.server.upload_types[upload_id] = self.headers.get(
+                'Content-Type', 'binary/octet-stream'
+            )
+            return self.reply(HTTPStatus.OK, self.xml(
+                'InitiateMultipartUploadResult',
+                f'<Key>{escape(key)}</Key><UploadId>{upload_id}</UploadId>'
+            ))
+        self.body()
+        parts = self.server.uploads.pop(query['uploadId'])
+        self.server.objects[key] = (
+            b''.join(parts[number] for number in sorted(parts)),
+            self.server.upload_types.pop(query['uploadId']),
+            time.time()
+        )
+        self.server.multipart_keys.append(key)
+        self.reply(HTTPStatus.OK, self.xml(
+            'CompleteMultipartUploadResult', f'<Key>{escape(key)}</Key>'
+        ))
+
+    def do_GET(self):
+        key, query = self.parse()
+        if not self.authorized(query):
+            return
+        if not key:
+            return self.list_objects(query)
+        if key not in self.server.objects:
+            return self.reply(HTTPStatus.NOT_FOUND)
+        self.reply(
+            HTTPStatus.OK,
+            self.server.objects[key][0],
+            self.object_headers(key)
+        )
+
+    def do_HEAD(self):
+        key, query = self.parse()
+        if not self.authorized(query):
+            return
+        if key not in self.server.objects:
+            return self.reply(HTTPStatus.NOT_FOUND)
+        headers = self.object_headers(key)
+        self.send_response(HTTPStatus.OK)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header(
+            'Content-Length', str(len(self.server.objects[key][0]))
+        )
+        self.end_headers()
+
+    def do_DELETE(self):
+        key, query = self.parse()
+        if not self.authorized(query):
+            return
+        if 'uploadId' in query:
+            self.server.uploads.pop(query['uploadId'], None)
+        else:
+            self.server.objects.pop(key, None)
+        self.reply(HTTPStatus.NO_CONTENT)
+
+    def list_objects(self, query):
+        prefix = query.get('prefix', '')
+        delimiter = query.get('delimiter', '')
+        keys, prefixes = [], set()
+        for key in sorted(self.server.objects):
+            if not key.startswith(prefix):
+                continue
+            rest = key[len(prefix):]
+            if delimiter and delimiter in rest:
+                prefixes.add(prefix + rest.split(delimiter)[0] + delimiter)
+            else:
+                keys.append(key)
+        content = f'<Prefix>{escape(prefix)}</Prefix>'
+        content += ''.join(
+            f'<Contents><Key>{escape(key)}</Key></Contents>' for key in keys
+        )
+        content += ''.join(
+            f'<CommonPrefixes><Prefix>{escape(name)}</Prefix>'
+            f'</CommonPrefixes>'
+            for name in sorted(prefixes)
+        )
+        self.reply(HTTPStatus.OK, self.xml('ListBucketResult', content))
+
+
+class S3Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), S3Handler)
+        self.objects = {}
+        self.uploads = {}
+        self.upload_types = {}
+        self.multipart_keys = []
+
+    @property
+    def endpoint_url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,105 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from ..cache import (cache_page_single_flight, get_or_compute, lock_key,
+                     single_flight)
+from ..checks import check_shared_cache
+
+
+class SingleFlightTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_value_computed_once(self):
+        """Значение считается один раз и дальше берётся из кэша."""
+        for _ in range(3):
+            self.assertEqual(single_flight('key', self.compute, 60), 1)
+        self.assertEqual(self.calls, 1)
+
+    @override_settings(SINGLE_FLIGHT_LOCK_TIMEOUT=0.1)
+    def test_locked_key_falls_back(self):
+        """Если блокировку держат слишком долго, значение считается."""
+        cache.add(lock_key('key'), 1)
+        self.assertEqual(single_flight('key', self.compute, 60), 1)
+
+    def test_stale_served_while_locked(self):
+        """Пока значение пересчитывается, отдаётся устаревшее."""
+        cache.set('key', ('stale', time.time() - 1, 0), 60)
+        cache.add(lock_key('key'), 1)
+        self.assertEqual(get_or_compute('key', self.compute, 60), 'stale')
+        self.assertEqual(self.calls, 0)
+        cache.delete(lock_key('key'))
+        self.assertEqual(get_or_compute('key', self.compute, 60), 1)
+        self.assertEqual(get_or_compute('key', self.compute, 60), 1)
+        self.assertEqual(self.calls, 1)
+
+
+class CachePageTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def get(self, make_response):
+        def view(request):
+            self.calls += 1
+            return make_response()
+        request = RequestFactory().get('/page/')
+        request.user = AnonymousUser()
+        return cache_page_single_flight(60)(view)(request)
+
+    def test_ok_cached(self):
+        """Обычная страница строится один раз."""
+        for _ in range(2):
+            self.get(lambda: HttpResponse('Страница'))
+        self.assertEqual(self.calls, 1)
+
+    def test_uncacheable_not_stored(self):
+        """Ошибки, ответы с cookies и private не попадают в кэш."""
+        def with_cookie():
+            response = HttpResponse('Страница')
+            response.set_cookie('sessionid', 'secret')
+            return response
+
+        def private():
+            response = HttpResponse('Страница')
+            response['Cache-Control'] = 'private'
+            return response
+
+        for make_response in (
+            lambda: HttpResponse('Ошибка', status=500), with_cookie, private
+        ):
+            with self.subTest(make_response=make_response):
+                cache.clear()
+                self.calls = 0
+                first = self.get(make_response)
+                self.get(make_response)
+                self.assertEqual(self.calls, 2)
+                self.assertNotIn('max-age', first.get('Cache-Control', ''))
+
+
+class SharedCacheCheckTest(TestCase):
+
+    def test_shared_cache(self):
+        """Кэш из настроек виден воркеру очереди."""
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_process_local_cache(self):
+        """Кэш в памяти процесса при отдельном воркере — предупреждение."""
+        self.assertEqual(
+            [warning.id for warning in check_shared_cache(None)],
+            ['core.W001']
+        )
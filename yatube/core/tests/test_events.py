@@ -0,0 +1,53 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from ..events import events_after, last_seq, publish, sse_response
+
+
+@override_settings(EVENTS_BUFFER_SIZE=3)
+class EventsTest(SimpleTestCase):
+    # события публикуются после коммита, а кэш лежит в базе
+    databases = {'default'}
+
+    def setUp(self):
+        cache.clear()
+
+    def test_events_after(self):
+        """Находятся только события новее after вместе с каналами."""
+        for event_id in (1, 2):
+            publish(['a'], event_id)
+        publish(['a', 'b'], 3)
+        self.assertEqual(last_seq(), 3)
+        self.assertEqual(
+            events_after(1), ([(2, ['a']), (3, ['a', 'b'])], False)
+        )
+        self.assertEqual(events_after(3), ([], False))
+
+    def test_poll_without_events(self):
+        """Опрос без новых событий читает из кэша только номер."""
+        publish(['a'], 1)
+        after = last_seq()
+        with mock.patch('core.events.cache', mock.Mock(wraps=cache)) as spy:
+            self.assertEqual(events_after(after), ([], False))
+        spy.get_many.assert_not_called()
+
+    def test_overflow(self):
+        """Вытесненные из буфера события отмечаются переполнением."""
+        for event_id in range(1, 6):
+            publish(['a'], event_id)
+        self.assertEqual(
+            events_after(0), ([(3, ['a']), (4, ['a']), (5, ['a'])], True)
+        )
+        self.assertEqual(events_after(3), ([(4, ['a']), (5, ['a'])], False))
+
+    def test_sse_response(self):
+        """Ответ SSE задаёт интервал переподключения и событие."""
+        response = sse_response('posts', {'count': 2})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertEqual(
+            response.content.decode(),
+            'retry: 15000\n\nevent: posts\ndata: {"count": 2}\n\n'
+        )
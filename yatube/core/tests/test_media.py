@@ -0,0 +1,74 @@
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.test import Client, TestCase, override_settings
+
+from ..media import media_storage
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+HASH = 'a' * 64
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ServeMediaTest(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.name = f'posts/aa/{HASH}.txt'
+        if not media_storage.exists(self.name):
+            media_storage.save(self.name, ContentFile(b'0123456789'))
+        self.url = settings.MEDIA_URL + self.name
+
+    def test_stream(self):
+        """Файл отдаётся целиком с кэшированием навсегда."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['ETag'], f'"{HASH}"')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_range(self):
+        """Запрос диапазона отдаёт только его."""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-4')
+        self.assertEqual(response.status_code, HTTPStatus.PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), b'234')
+        self.assertEqual(response['Content-Range'], 'bytes 2-4/10')
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+        response = self.client.get(self.url, HTTP_RANGE='bytes=20-')
+        self.assertEqual(
+            response.status_code,
+            HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+
+    def test_not_modified(self):
+        """Повторный запрос с ETag получает 304."""
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{HASH}"')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    @override_settings(MEDIA_SENDFILE='nginx')
+    def test_accel_redirect(self):
+        """С nginx Django отдаёт только заголовок X-Accel-Redirect."""
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            settings.MEDIA_ACCEL_PREFIX + self.name
+        )
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'text/plain')
+
+    def test_outside_media_root(self):
+        """Пути за пределами MEDIA_ROOT и скрытые файлы не отдаются."""
+        for url in ('/media/../manage.py', '/media/posts/.hidden'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -0,0 +1,115 @@
+import gzip
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, Client, override_settings
+
+from ..compression import precompress
+from ..middleware import AdmissionController, CompressionMiddleware
+
+User = get_user_model()
+
+
+class AdmissionControllerTest(TestCase):
+
+    def test_view_limit(self):
+        """Страница не получает больше слотов, чем её лимит."""
+        controller = AdmissionController(10, 0, 1)
+        self.assertTrue(controller.acquire('posts:profile', limit=1))
+        self.assertFalse(controller.acquire('posts:profile', limit=1))
+        self.assertTrue(controller.acquire('posts:index'))
+        controller.release('posts:profile')
+        self.assertTrue(controller.acquire('posts:profile', limit=1))
+
+    def test_reserved_for_writes(self):
+        """Зарезервированные слоты доступны только запросам на запись."""
+        controller = AdmissionController(2, 1, 1)
+        self.assertTrue(controller.acquire('posts:index'))
+        self.assertFalse(controller.acquire('posts:index'))
+        self.assertTrue(controller.acquire('posts:add_comment', write=True))
+
+    def test_wait_timeout(self):
+        """Запрос ждёт свободный слот не дольше таймаута."""
+        controller = AdmissionController(1, 0, 1)
+        self.assertTrue(controller.acquire('posts:index'))
+        self.assertFalse(controller.acquire('posts:index', timeout=0.01))
+
+
+class AdmissionControlMiddlewareTest(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='test_author')
+        self.guest_client = Client()
+
+    @override_settings(ADMISSION_VIEW_LIMITS={'posts:profile': 0})
+    def test_low_priority_rejected(self):
+        """Робот сразу получает 503 с Retry-After."""
+        response = self.guest_client.get(
+            f'/profile/{self.author.username}/',
+            HTTP_USER_AGENT='Googlebot/2.1'
+        )
+        self.assertEqual(
+            response.status_code, HTTPStatus.SERVICE_UNAVAILABLE
+        )
+        self.assertIn('Retry-After', response)
+
+    @override_settings(ADMISSION_VIEW_LIMITS={'posts:profile': 1})
+    def test_slot_released(self):
+        """После ответа слот освобождается."""
+        for _ in range(3):
+            response = self.guest_client.get(
+                f'/profile/{self.author.username}/'
+            )
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class CompressionMiddlewareTest(TestCase):
+
+    def setUp(self):
+        self.request = RequestFactory().get(
+            '/', HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.html = b'<p>yatube</p>' * 200
+
+    def process(self, response):
+        return CompressionMiddleware(lambda request: response)(self.request)
+
+    def test_compress(self):
+        """Большая страница сжимается, маленькая — нет."""
+        response = self.process(HttpResponse(self.html))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content), self.html)
+        response = self.process(HttpResponse(b'<p>yatube</p>'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_not_accepted(self):
+        """Клиент без поддержки сжатия получает исходный ответ."""
+        self.request.META['HTTP_ACCEPT_ENCODING'] = 'identity'
+        response = self.process(HttpResponse(self.html))
+        self.assertEqual(response.content, self.html)
+
+    def test_streaming(self):
+        """Потоковый ответ сжимается по частям."""
+        response = self.process(
+            StreamingHttpResponse(iter([self.html, self.html]))
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), self.html * 2)
+
+    def test_precompressed(self):
+        """Для страницы из кэша берётся сохранённый сжатый вариант."""
+        response = precompress(HttpResponse(self.html))
+        with mock.patch('core.middleware.compress') as compress:
+            response = self.process(response)
+        compress.assert_not_called()
+        self.assertEqual(gzip.decompress(response.content), self.html)
+
+    def test_index(self):
+        """Главная страница отдаётся сжатой."""
+        response = Client().get('/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn(response['Content-Encoding'], ('gzip', 'br'))
@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(RATELIMITS={'add_comment': '2/m', 'login': '1/m'})
+class RateLimitTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='test_user')
+        self.post = Post.objects.create(text='Тестовый пост', author=self.user)
+        self.authorized_user = Client()
+        self.authorized_user.force_login(self.user)
+
+    def test_comment_limit(self):
+        """После исчерпания лимита комментарии не сохраняются."""
+        url = reverse('posts:add_comment', args=(self.post.pk,))
+        for _ in range(2):
+            response = self.authorized_user.post(url, {'text': 'Коммент'})
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+            self.assertIn('X-RateLimit-Remaining', response)
+        response = self.authorized_user.post(url, {'text': 'Коммент'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_login_limit_by_ip(self):
+        """Вход ограничивается по IP, GET не учитывается."""
+        url = reverse('users:login')
+        guest_client = Client()
+        self.assertEqual(guest_client.get(url).status_code, HTTPStatus.OK)
+        data = {'username': 'test_user', 'password': 'wrong'}
+        self.assertEqual(
+            guest_client.post(url, data).status_code, HTTPStatus.OK
+        )
+        self.assertEqual(
+            guest_client.post(url, data).status_code,
+            HTTPStatus.TOO_MANY_REQUESTS
+        )
+        self.assertEqual(guest_client.get(url).status_code, HTTPStatus.OK)
+
+    @override_settings(RATELIMIT_TRUSTED_PROXY_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_login_limit_behind_proxy(self):
+        """За прокси клиенты считаются по адресу из заголовка прокси."""
+        url = reverse('users:login')
+        data = {'username': 'test_user', 'password': 'wrong'}
+        first = Client(HTTP_X_FORWARDED_FOR='203.0.113.1')
+        second = Client(HTTP_X_FORWARDED_FOR='203.0.113.2')
+        self.assertEqual(first.post(url, data).status_code, HTTPStatus.OK)
+        self.assertEqual(second.post(url, data).status_code, HTTPStatus.OK)
+        # подставленный клиентом адрес левее адреса от прокси не помогает
+        spoofed = Client(HTTP_X_FORWARDED_FOR='198.51.100.7, 203.0.113.1')
+        self.assertEqual(
+            spoofed.post(url, data).status_code,
+            HTTPStatus.TOO_MANY_REQUESTS
+        )
@@ -0,0 +1,76 @@
+import gzip
+import hashlib
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.test import TestCase, Client
+
+from ..resilience import STALE_BANNER, statement_timeout
+
+User = get_user_model()
+
+SLOW_QUERY = (
+    'WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c '
+    'WHERE x < 100000000) SELECT count(*) FROM c'
+)
+
+
+class StaleIfErrorTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='test_author')
+        self.guest_client = Client()
+        self.url = f'/profile/{self.author.username}/'
+
+    def test_statement_timeout(self):
+        """Долгий запрос прерывается по таймауту."""
+        with self.assertRaises(OperationalError):
+            with statement_timeout(0.05):
+                with connection.cursor() as cursor:
+                    cursor.execute(SLOW_QUERY)
+
+    def test_stale_copy_served(self):
+        """При ошибке базы отдаётся сохранённая копия с пометкой."""
+        self.guest_client.get(self.url)
+        with mock.patch(
+            'posts.views.counts.posts_count',
+            side_effect=OperationalError
+        ):
+            response = self.guest_client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['X-Stale-If-Error'], '1')
+        self.assertIn('сохранённая копия', response.content.decode())
+
+    def test_stale_copy_compressed(self):
+        """Сжатая сохранённая копия главной тоже с пометкой."""
+        self.guest_client.get('/')
+        # без страницы из кэша главная идёт в базу
+        key = f'stale:{hashlib.md5(b"http://testserver/").hexdigest()}'
+        stale = cache.get(key)
+        cache.clear()
+        cache.set(key, stale)
+        with mock.patch(
+            'posts.views.counts.posts_count',
+            side_effect=OperationalError
+        ):
+            response = self.guest_client.get(
+                '/', HTTP_ACCEPT_ENCODING='gzip'
+            )
+        self.assertEqual(response['X-Stale-If-Error'], '1')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(
+            STALE_BANNER, gzip.decompress(response.content).decode()
+        )
+
+    def test_error_without_copy(self):
+        """Без сохранённой копии ошибка не скрывается."""
+        with mock.patch(
+            'posts.views.counts.posts_count',
+            side_effect=OperationalError
+        ):
+            with self.assertRaises(OperationalError):
+                self.guest_client.get(self.url)
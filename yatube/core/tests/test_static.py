@@ -0,0 +1,83 @@
+import gzip
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+
+TEMP_STATIC_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CSS = b'body { color: black; }\n' * 100
+
+
+@override_settings(
+    STATICFILES_DIRS=[TEMP_STATIC_DIR],
+    STATIC_ROOT=TEMP_STATIC_ROOT,
+)
+class StaticPipelineTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(TEMP_STATIC_DIR, 'css'))
+        with open(os.path.join(TEMP_STATIC_DIR, 'css', 'site.css'), 'wb') as f:
+            f.write(CSS)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_DIR, ignore_errors=True)
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.url = Template(
+            "{% load static %}{% static 'css/site.css' %}"
+        ).render(Context())
+
+    def test_collectstatic(self):
+        """collectstatic добавляет хэш в имя и пишет сжатый вариант."""
+        self.assertRegex(self.url, r'^/static/css/site\.[0-9a-f]{12}\.css$')
+        name = self.url[len(settings.STATIC_URL):]
+        self.assertTrue(
+            os.path.exists(os.path.join(TEMP_STATIC_ROOT, name + '.gz'))
+        )
+
+    def test_manifest_strict(self):
+        """Без записи в манифесте ссылка без хэша только при разработке."""
+        template = Template("{% load static %}{% static 'css/missing.css' %}")
+        with override_settings(STATIC_MANIFEST_STRICT=False):
+            self.assertEqual(
+                template.render(Context()), '/static/css/missing.css'
+            )
+        with override_settings(STATIC_MANIFEST_STRICT=True):
+            with self.assertRaises(ValueError):
+                template.render(Context())
+
+    def test_serve_compressed(self):
+        """Клиенту с gzip отдаётся готовый сжатый файл."""
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('immutable', response['Cache-Control'])
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), CSS)
+
+    def test_serve_identity(self):
+        """Клиент без сжатия получает исходный файл."""
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), CSS)
+
+    def test_plain_name(self):
+        """Файл без хэша в имени кэшируется ненадолго."""
+        response = self.client.get('/static/css/site.css')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotIn('immutable', response['Cache-Control'])
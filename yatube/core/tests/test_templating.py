@@ -0,0 +1,42 @@
+import io
+
+from django.conf import settings
+from django.core.management import call_command
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from ..templating import precompile_templates, template_names
+
+CACHED_TEMPLATES = [{
+    **settings.TEMPLATES[0],
+    'OPTIONS': {
+        **settings.TEMPLATES[0]['OPTIONS'],
+        'loaders': [(
+            'django.template.loaders.cached.Loader',
+            ['django.template.loaders.filesystem.Loader'],
+        )],
+    },
+}]
+
+
+class PrecompileTemplatesTest(SimpleTestCase):
+
+    @override_settings(TEMPLATES=CACHED_TEMPLATES)
+    def test_precompile(self):
+        """Все шаблоны из templates/ попадают в кэш загрузчика."""
+        names = set(template_names(settings.TEMPLATES_DIR))
+        self.assertIn('base.html', names)
+        self.assertIn('posts/includes/posts.html', names)
+        self.assertEqual(precompile_templates(), len(names))
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertTrue(names <= set(loader.get_template_cache))
+
+    def test_without_cached_loader(self):
+        """Без кэширующего загрузчика шаблоны не загружаются."""
+        self.assertEqual(precompile_templates(), 0)
+
+    def test_benchmark(self):
+        """Бенчмарк рендерит ленту с кэшем шаблонов и без него."""
+        out = io.StringIO()
+        call_command('benchmark_templates', iterations=1, stdout=out)
+        self.assertIn('Ускорение', out.getvalue())
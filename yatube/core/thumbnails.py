@@ -0,0 +1,81 @@
+import hashlib
+
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import defaults, settings as thumbnail_settings
+from sorl.thumbnail.helpers import toint
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.parsers import parse_geometry
+
+# значения EXIF Orientation, при которых картинка повёрнута на 90°
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def image_metadata(file):
+    """Ширина, высота с учётом EXIF-поворота и sha256 содержимого."""
+    file.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(64 * 1024), b''):
+        digest.update(chunk)
+    file.seek(0)
+    with Image.open(file) as image:
+        width, height = image.size
+        if image.getexif().get(0x0112) in ROTATED_ORIENTATIONS:
+            width, height = height, width
+    file.seek(0)
+    return width, height, digest.hexdigest()
+
+
+class StoredThumbnail:
+    """Миниатюра, адрес и размеры которой вычислены без обращения
+    к хранилищу и key-value store sorl-thumbnail."""
+
+    def __init__(self, name, width, height):
+        self.name = name
+        self.width = width
+        self.height = height
+
+    @property
+    def url(self):
+        return default.storage.url(self.name)
+
+
+def thumbnail_options(source, options):
+    """Опции миниатюры с умолчаниями, как их дополняет sorl-thumbnail."""
+    backend = default.backend
+    options = dict(options)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(defaults, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def thumbnail_size(width, height, geometry, options):
+    """Размер миниатюры, повторяет scale и crop движка sorl-thumbnail."""
+    geometry = parse_geometry(geometry, width / height)
+    factors = (geometry[0] / width, geometry[1] / height)
+    factor = max(factors) if options['crop'] else min(factors)
+    if factor < 1 or options['upscale']:
+        width, height = toint(width * factor), toint(height * factor)
+    if options['crop'] and options['crop'] != 'noop':
+        width, height = min(width, geometry[0]), min(height, geometry[1])
+    return width, height
+
+
+def stored_thumbnail(image, width, height, geometry, **options):
+    """Миниатюра по сохранённым размерам исходной картинки.
+
+    Имя файла совпадает с тем, что создаёт get_thumbnail с теми же
+    параметрами, поэтому сам файл строится заранее фоновой задачей.
+    """
+    source = ImageFile(image)
+    options = thumbnail_options(source, options)
+    name = default.backend._get_thumbnail_filename(source, geometry, options)
+    return StoredThumbnail(
+        name, *thumbnail_size(width, height, geometry, options)
+    )
@@ -0,0 +1,13 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path(
+        'fragments/header-user/',
+        views.header_user,
+        name='header_user'
+    ),
+]
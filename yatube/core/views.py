@@ -1,4 +1,6 @@
 from django.shortcuts import render
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
 from http import HTTPStatus
 
 
@@ -28,3 +30,15 @@ def server_error(request):
         'core/500.html',
         status=HTTPStatus.INTERNAL_SERVER_ERROR
     )
+
+
+@require_safe
+def header_user(request):
+    """Блок пользователя в шапке для сохранённых страниц."""
+    response = render(
+        request,
+        'includes/header_user.html',
+        {'view_name': request.GET.get('view', '')}
+    )
+    patch_cache_control(response, private=True)
+    return response
@@ -0,0 +1,62 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.queue import claim_jobs, prune_jobs, requeue_stale
+from jobs.worker import execute, init_worker
+
+
+class Command(BaseCommand):
+    help = 'Выполняет отложенные задачи из очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=settings.JOBS_PROCESSES,
+            help='Число процессов; 0 — выполнять задачи в этом процессе.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и завершиться.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        if processes == 0:
+            self.loop(map, 1, options)
+            return
+        # spawn вместо fork: процессы не делят с родителем соединения с базой
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker
+        ) as pool:
+            self.loop(pool.map, processes * 2, options)
+
+    def loop(self, runner, batch, options):
+        pruned = None
+        while True:
+            if pruned is None or (
+                time.monotonic() - pruned >= settings.JOBS_PRUNE_INTERVAL
+            ):
+                prune_jobs()
+                pruned = time.monotonic()
+            requeue_stale()
+            pks = claim_jobs(batch)
+            for pk, status in zip(pks, runner(execute, pks)):
+                self.stdout.write(f'Задача {pk}: {status}')
+            if not pks:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
@@ -0,0 +1,22 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='key',
+            field=models.CharField(blank=True, db_index=True, max_length=200, null=True, verbose_name='Ключ идемпотентности'),
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(status__in=('pending', 'running')), fields=('key',), name='jobs_job_active_key'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Отложенная задача в очереди."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    # ключ идемпотентности занят, пока задача не завершилась
+    ACTIVE = (PENDING, RUNNING)
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    task = models.CharField('Задача', max_length=200)
+    args = models.TextField('Аргументы', default='[]')
+    key = models.CharField(
+        'Ключ идемпотентности',
+        max_length=200,
+        db_index=True,
+        null=True,
+        blank=True
+    )
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveIntegerField('Максимум попыток', default=5)
+    run_at = models.DateTimeField('Запустить после', default=timezone.now)
+    locked_at = models.DateTimeField('Взята в работу', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+
+    class Meta:
+        ordering = ['run_at']
+        indexes = [models.Index(fields=['status', 'run_at'])]
+        constraints = [
+            # то же, что ACTIVE: из Meta атрибуты модели не видны
+            models.UniqueConstraint(
+                fields=['key'],
+                condition=models.Q(status__in=('pending', 'running')),
+                name='jobs_job_active_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.task} ({self.status})'
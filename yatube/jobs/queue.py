@@ -0,0 +1,120 @@
+import json
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+_registry = {}
+
+
+def task(func):
+    """Регистрирует функцию как задачу, которую можно поставить в очередь.
+
+    Аргументы задачи сохраняются в JSON, поэтому передавать нужно
+    простые значения: id объектов, строки, числа.
+    """
+    func.task_name = f'{func.__module__}.{func.__name__}'
+    _registry[func.task_name] = func
+    return func
+
+
+def get_task(name):
+    if name not in _registry:
+        _registry[name] = import_string(name)
+    return _registry[name]
+
+
+def enqueue(func, *args, key=None, delay=0, max_attempts=None):
+    """Ставит задачу в очередь и возвращает Job.
+
+    Если задача с таким key ждёт в очереди или выполняется, новая не
+    создаётся. После завершения задачи ключ снова свободен.
+    """
+    name = getattr(func, 'task_name', func)
+    defaults = {
+        'task': name,
+        'args': json.dumps(args),
+        'run_at': timezone.now() + timedelta(seconds=delay),
+        'max_attempts': max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    }
+    if key is None:
+        job = Job.objects.create(**defaults)
+    else:
+        job, created = Job.objects.get_or_create(
+            key=key, status__in=Job.ACTIVE, defaults=defaults
+        )
+        if not created:
+            return job
+    if settings.JOBS_EAGER and claim_job(job.pk):
+        run_job(job.pk)
+    return job
+
+
+def claim_job(pk):
+    """Атомарно переводит задачу в работу, False — если её уже взяли."""
+    return bool(Job.objects.filter(pk=pk, status=Job.PENDING).update(
+        status=Job.RUNNING,
+        locked_at=timezone.now(),
+        attempts=F('attempts') + 1
+    ))
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи упавших воркеров.
+
+    Попытка засчитана ещё при взятии задачи, поэтому задача, которая
+    роняет воркер, после max_attempts таких падений помечается FAILED.
+    """
+    deadline = timezone.now() - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=deadline)
+    error = 'Воркер не завершил задачу за JOBS_LOCK_TIMEOUT секунд'
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, locked_at=None, last_error=error
+    )
+    return stale.update(status=Job.PENDING, locked_at=None, last_error=error)
+
+
+def prune_jobs():
+    """Удаляет завершённые задачи старше JOBS_RETENTION секунд."""
+    deadline = timezone.now() - timedelta(seconds=settings.JOBS_RETENTION)
+    deleted, _ = Job.objects.filter(
+        status__in=(Job.DONE, Job.FAILED),
+        run_at__lt=deadline
+    ).delete()
+    return deleted
+
+
+def claim_jobs(limit):
+    pks = Job.objects.filter(
+        status=Job.PENDING,
+        run_at__lte=timezone.now()
+    ).values_list('pk', flat=True)[:limit]
+    return [pk for pk in list(pks) if claim_job(pk)]
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def run_job(pk):
+    """Выполняет взятую в работу задачу и возвращает её новый статус."""
+    job = Job.objects.get(pk=pk)
+    try:
+        get_task(job.task)(*json.loads(job.args))
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+        else:
+            job.status = Job.PENDING
+            job.run_at = timezone.now() + retry_delay(job.attempts)
+    else:
+        job.status = Job.DONE
+    job.locked_at = None
+    job.save(update_fields=['status', 'run_at', 'locked_at', 'last_error'])
+    return job.status
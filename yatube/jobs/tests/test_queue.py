@@ -0,0 +1,143 @@
+import json
+import re
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Job
+from ..queue import (claim_job, enqueue, prune_jobs, requeue_stale, run_job,
+                     task)
+
+User = get_user_model()
+
+calls = []
+
+
+@task
+def remember(value):
+    calls.append(value)
+
+
+@task
+def fail():
+    raise ValueError('Ошибка задачи')
+
+
+class QueueTest(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def run_worker(self):
+        call_command('run_jobs', processes=0, once=True, stdout=StringIO())
+
+    def test_enqueue_and_run(self):
+        """Задача выполняется воркером, а не при постановке в очередь."""
+        job = enqueue(remember, 1)
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(calls, [])
+        self.run_worker()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(calls, [1])
+
+    def test_idempotency_key(self):
+        """Задача с тем же ключом не ставится повторно."""
+        first = enqueue(remember, 1, key='remember-1')
+        second = enqueue(remember, 1, key='remember-1')
+        self.assertEqual(first.pk, second.pk)
+        self.run_worker()
+        self.assertEqual(calls, [1])
+
+    def test_key_freed_after_finish(self):
+        """После выполнения или ошибки задачу с тем же ключом можно
+        поставить снова."""
+        done = enqueue(remember, 1, key='remember')
+        self.run_worker()
+        again = enqueue(remember, 1, key='remember')
+        self.assertNotEqual(again.pk, done.pk)
+        self.assertEqual(enqueue(remember, 1, key='remember').pk, again.pk)
+        failed = enqueue(fail, key='fail', max_attempts=1)
+        self.assertTrue(claim_job(failed.pk))
+        self.assertEqual(run_job(failed.pk), Job.FAILED)
+        self.assertNotEqual(enqueue(fail, key='fail').pk, failed.pk)
+
+    def test_prune(self):
+        """Завершённые задачи удаляются после JOBS_RETENTION."""
+        old = timezone.now() - timedelta(seconds=settings.JOBS_RETENTION + 1)
+        for status in (Job.DONE, Job.FAILED, Job.PENDING):
+            Job.objects.create(task='remember', status=status, run_at=old)
+        recent = Job.objects.create(task='remember', status=Job.DONE)
+        self.assertEqual(prune_jobs(), 2)
+        self.assertEqual(
+            set(Job.objects.values_list('status', flat=True)),
+            {Job.PENDING, recent.status}
+        )
+
+    @override_settings(JOBS_MAX_ATTEMPTS=2)
+    def test_retry_with_backoff(self):
+        """Упавшая задача откладывается и после всех попыток помечается."""
+        job = enqueue(fail)
+        self.assertTrue(claim_job(job.pk))
+        self.assertEqual(run_job(job.pk), Job.PENDING)
+        job.refresh_from_db()
+        self.assertGreater(job.run_at, job.created)
+        self.assertIn('Ошибка задачи', job.last_error)
+        self.assertTrue(claim_job(job.pk))
+        self.assertEqual(run_job(job.pk), Job.FAILED)
+
+    @override_settings(JOBS_MAX_ATTEMPTS=2)
+    def test_requeue_stale(self):
+        """Задача, ронявшая воркер все попытки, помечается FAILED."""
+        job = enqueue(remember, 3)
+        stale = timezone.now() - timedelta(
+            seconds=settings.JOBS_LOCK_TIMEOUT + 1
+        )
+        self.assertTrue(claim_job(job.pk))
+        Job.objects.filter(pk=job.pk).update(locked_at=stale)
+        self.assertEqual(requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertTrue(claim_job(job.pk))
+        Job.objects.filter(pk=job.pk).update(locked_at=stale)
+        self.assertEqual(requeue_stale(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIn('JOBS_LOCK_TIMEOUT', job.last_error)
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager(self):
+        """В режиме JOBS_EAGER задача выполняется сразу."""
+        job = enqueue(remember, 2)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(calls, [2])
+
+    def test_password_reset_mail_queued(self):
+        """Письмо для сброса пароля отправляется через очередь, а токен
+        в таблице задач не хранится."""
+        user = User.objects.create_user(
+            username='test_user', email='test@yatube.ru', password='pass'
+        )
+        Client().post(
+            reverse('users:password_reset_form'),
+            {'email': 'test@yatube.ru'}
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        job = Job.objects.get()
+        self.assertEqual(json.loads(job.args)[0], user.pk)
+        self.run_worker()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['test@yatube.ru'])
+        token = re.search(r'/reset/[\w-]+/([\w-]+)/', mail.outbox[0].body)
+        self.assertNotIn(token[1], job.args)
+        self.assertTrue(default_token_generator.check_token(user, token[1]))
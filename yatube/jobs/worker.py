@@ -0,0 +1,16 @@
+"""Функции для процессов воркера.
+
+Процессы запускаются через spawn, поэтому модуль не импортирует
+ничего из Django до вызова init_worker.
+"""
+import django
+
+
+def init_worker():
+    django.setup()
+
+
+def execute(pk):
+    from .queue import run_job
+
+    return run_job(pk)
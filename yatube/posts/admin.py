@@ -1,15 +1,53 @@
+from functools import partial
+
 from django.contrib import admin
 
+from core.counts import count_rows
+from core.paginator import CachedCountPaginator
+
 from .models import Group, Post, Comment, Follow
 
 
-class PostAdmin(admin.ModelAdmin):
+class EstimatedCountMixin:
+    """Число строк в changelist по оценке СУБД вместо COUNT(*)."""
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        return CachedCountPaginator(
+            queryset,
+            per_page,
+            count_func=partial(count_rows, queryset),
+            orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page
+        )
+
+
+class PostAdmin(EstimatedCountMixin, admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
+    list_select_related = ('author', 'group',)
     list_editable = ('group',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    autocomplete_fields = ('author',)
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def get_changelist_form(self, request, **kwargs):
+        form_class = super().get_changelist_form(request, **kwargs)
+        # список групп выбирается один раз на страницу,
+        # а не отдельным запросом для каждой строки
+        group_choices = list(
+            form_class.base_fields['group'].choices
+        )
+
+        class ChangeListForm(form_class):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.fields['group'].choices = group_choices
+
+        return ChangeListForm
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('pk', 'title', 'slug', 'description',)
@@ -17,17 +55,23 @@ class GroupAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(EstimatedCountMixin, admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author',)
-    search_fields = ('text', 'author',)
-    list_filter = ('pub_date', 'author')
+    list_select_related = ('author',)
+    search_fields = ('text', '=author__username',)
+    list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    autocomplete_fields = ('post', 'author',)
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
 
 class FollowAdmin(admin.ModelAdmin):
     list_display = ('author', 'user',)
-    search_fields = ('author',)
-    list_filter = ('author', 'user',)
+    list_select_related = ('author', 'user',)
+    search_fields = ('=author__username', '=user__username',)
+    autocomplete_fields = ('author', 'user',)
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
 
@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from core.cache import single_flight
+from core.counters import BufferedCounter
+from core.counts import count_rows
+from .models import Follow, Post
+
+INDEX_SCOPE = 'index'
+
+post_views = BufferedCounter(Post, 'views')
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def follow_scope(user_id):
+    return f'follow:{user_id}'
+
+
+def cache_key(scope):
+    return f'posts_count:{scope}'
+
+
+def posts_count(scope, queryset):
+    """Число постов в ленте scope.
+
+    Значение хранится в кэше и поддерживается сигналами из signals.py,
+    при промахе считается заново через count_rows одним запросом.
+    """
+    return single_flight(
+        cache_key(scope),
+        lambda: count_rows(queryset),
+        settings.POSTS_COUNT_TIMEOUT
+    )
+
+
+def post_scopes(post):
+    scopes = [INDEX_SCOPE, author_scope(post.author_id)]
+    if post.group_id is not None:
+        scopes.append(group_scope(post.group_id))
+    return scopes
+
+
+def change_counts(scopes, delta):
+    for scope in scopes:
+        try:
+            cache.incr(cache_key(scope), delta)
+        except ValueError:
+            # значения нет в кэше, посчитается при следующем запросе
+            pass
+
+
+def invalidate(scopes):
+    cache.delete_many([cache_key(scope) for scope in scopes])
+
+
+def follower_scopes(author_id):
+    followers = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    return [follow_scope(user_id) for user_id in followers]
+
+
+def followers_cache_key(author_id):
+    return f'followers_count:{author_id}'
+
+
+def followers_count(author_id):
+    """Число подписчиков автора, поддерживается сигналами Follow."""
+    return single_flight(
+        followers_cache_key(author_id),
+        lambda: Follow.objects.filter(author_id=author_id).count(),
+        settings.POSTS_COUNT_TIMEOUT
+    )
+
+
+def change_followers(author_id, delta):
+    try:
+        cache.incr(followers_cache_key(author_id), delta)
+    except ValueError:
+        pass
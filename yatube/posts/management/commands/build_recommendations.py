@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации «кого почитать» для всех '
+        'пользователей с подписками. С NumPy и SciPy считает '
+        'разреженными матрицами.'
+    )
+
+    def handle(self, *args, **options):
+        users = recommendations.build()
+        engine = 'SciPy' if recommendations.sparse is not None else 'Python'
+        self.stdout.write(self.style.SUCCESS(
+            f'Пользователей: {users}, расчёт: {engine}.'
+        ))
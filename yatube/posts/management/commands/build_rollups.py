@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.rollups import build
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинги «популярное за неделю» и «в тренде '
+        'в группе». Обычно их пересчитывает очередь, команда — для cron.'
+    )
+
+    def handle(self, *args, **options):
+        rollups = build()
+        self.stdout.write(self.style.SUCCESS(
+            f'Популярных постов: {len(rollups["popular"])}, '
+            f'групп в трендах: {len(rollups["trending"])}.'
+        ))
@@ -0,0 +1,48 @@
+import posixpath
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.tasks import collect_image_file
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки постов, на которые не ссылается ни один пост, '
+        'вместе с их миниатюрами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, что будет удалено.'
+        )
+
+    def handle(self, *args, **options):
+        field = Post._meta.get_field('image')
+        storage = field.storage
+        referenced = set(
+            Post.objects.exclude(image='').values_list('image', flat=True)
+        )
+        deleted = 0
+        for name in self.walk(storage, field.upload_to.rstrip('/')):
+            if name in referenced:
+                continue
+            if options['dry_run']:
+                self.stdout.write(f'Будет удалён: {name}')
+                deleted += 1
+            elif collect_image_file(name):
+                self.stdout.write(f'Удалён: {name}')
+                deleted += 1
+        self.stdout.write(self.style.SUCCESS(f'Удалено файлов: {deleted}'))
+
+    def walk(self, storage, path):
+        try:
+            directories, files = storage.listdir(path)
+        except FileNotFoundError:
+            return
+        for name in files:
+            yield posixpath.join(path, name)
+        for directory in directories:
+            yield from self.walk(storage, posixpath.join(path, directory))
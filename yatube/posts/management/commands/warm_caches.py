@@ -0,0 +1,157 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from core.cache import shared_cache
+from posts.models import Group, Post
+from posts.tasks import make_thumbnail
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает кэш после деплоя: открывает самые посещаемые страницы '
+        'и создаёт миниатюры картинок свежих постов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--depth',
+            type=int,
+            default=3,
+            help='Сколько страниц главной ленты открыть.'
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Сколько самых больших групп и популярных авторов открыть.'
+        )
+        parser.add_argument(
+            '--recent',
+            type=int,
+            default=settings.PAGE_POST * 5,
+            help='Для скольких свежих постов открыть страницу и миниатюру.'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=4,
+            help='Число одновременных запросов.'
+        )
+        parser.add_argument(
+            '--host',
+            help=(
+                'Имя сайта для страниц, которые строятся в этом процессе. '
+                'Ключи кэша страниц включают адрес, поэтому он должен '
+                'совпадать с тем, по которому ходят пользователи. '
+                'По умолчанию первое из ALLOWED_HOSTS.'
+            )
+        )
+        parser.add_argument(
+            '--secure',
+            action='store_true',
+            help='Строить страницы как запрошенные по HTTPS.'
+        )
+        parser.add_argument(
+            '--base-url',
+            help=(
+                'Адрес запущенного сайта. Без него страницы строятся в этом '
+                'процессе, что имеет смысл только с общим кэшем.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        self.fetch = self.http_fetch(options)
+        posts = list(
+            Post.objects.order_by('-pub_date')[:options['recent']]
+        )
+        urls = self.hot_urls(posts, options)
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            for done, (url, status, seconds) in enumerate(
+                pool.map(self.warm_url, urls), 1
+            ):
+                self.stdout.write(
+                    f'[{done}/{len(urls)}] {status} {url} {seconds:.2f} с'
+                )
+            images = [post.image for post in posts if post.image]
+            thumbnails_started = time.monotonic()
+            for done, _ in enumerate(pool.map(self.warm_image, images), 1):
+                self.stdout.write(f'Миниатюры: {done}/{len(images)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрето страниц: {len(urls)}, миниатюр: {len(images)}. '
+            f'Миниатюры: {time.monotonic() - thumbnails_started:.2f} с, '
+            f'всего: {time.monotonic() - started:.2f} с.'
+        ))
+
+    def hot_urls(self, posts, options):
+        index = reverse('posts:index')
+        urls = [index] + [
+            f'{index}?page={page}' for page in range(2, options['depth'] + 1)
+        ]
+        groups = Group.objects.annotate(
+            posts_count=Count('posts')
+        ).order_by('-posts_count').values_list('slug', flat=True)
+        urls += [
+            reverse('posts:group_list', args=(slug,))
+            for slug in groups[:options['top']]
+        ]
+        authors = User.objects.annotate(
+            followers_count=Count('following')
+        ).order_by('-followers_count').values_list('username', flat=True)
+        urls += [
+            reverse('posts:profile', args=(username,))
+            for username in authors[:options['top']]
+        ]
+        urls += [
+            reverse('posts:post_detail', args=(post.pk,)) for post in posts
+        ]
+        return urls
+
+    def http_fetch(self, options):
+        base_url = options['base_url']
+        if base_url is None:
+            if not shared_cache():
+                raise CommandError(
+                    'Кэш из настроек виден только этому процессу и исчезнет '
+                    'вместе с ним. Укажите --base-url запущенного сайта.'
+                )
+            host = options['host'] or (settings.ALLOWED_HOSTS or [''])[0]
+            if not host or host == '*' or host.startswith('.'):
+                raise CommandError(
+                    'Укажите --host или --base-url: без настоящего имени '
+                    'сайта прогретые страницы не найдутся в кэше.'
+                )
+            client = Client(HTTP_HOST=host)
+            secure = options['secure']
+            return lambda url: client.get(url, secure=secure).status_code
+        session = requests.Session()
+        base_url = base_url.rstrip('/')
+        return lambda url: session.get(base_url + url).status_code
+
+    def warm_url(self, url):
+        started = time.monotonic()
+        try:
+            status = self.fetch(url)
+        except requests.RequestException as error:
+            status = type(error).__name__
+        finally:
+            # у каждого потока своё соединение с базой
+            connection.close()
+        return url, status, time.monotonic() - started
+
+    def warm_image(self, image):
+        try:
+            make_thumbnail(image)
+        finally:
+            connection.close()
@@ -0,0 +1,45 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:43
+
+from django.db import migrations, models
+
+from core.thumbnails import image_metadata
+
+
+def fill_image_metadata(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    for post in Post.objects.exclude(image='').iterator():
+        try:
+            with post.image.open('rb') as file:
+                width, height, digest = image_metadata(file)
+        except (OSError, ValueError):
+            # файла нет или это не картинка, миниатюра строится по-старому
+            continue
+        Post.objects.filter(pk=post.pk).update(
+            image_width=width, image_height=height, image_hash=digest
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_pub_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_image_metadata, migrations.RunPython.noop),
+    ]
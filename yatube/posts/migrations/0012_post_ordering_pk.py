@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='post',
+            options={'ordering': ['-pub_date', '-pk']},
+        ),
+    ]
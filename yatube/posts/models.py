@@ -2,6 +2,7 @@ from django.contrib.auth import get_user_model
 from django.db import models
 from django.db.models.constraints import UniqueConstraint
 from core.models import CreatedModel
+from core.storage import ContentAddressedStorage
 
 User = get_user_model()
 
@@ -36,15 +37,41 @@ class Post(CreatedModel):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    # заполняются при загрузке картинки, чтобы строить миниатюры
+    # без чтения файла из хранилища
+    image_width = models.PositiveIntegerField(
+        null=True, blank=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        null=True, blank=True, editable=False
+    )
+    image_hash = models.CharField(max_length=64, blank=True, editable=False)
+    # растёт пачками из posts.counts.post_views, свежие просмотры
+    # ещё лежат в кэше
+    views = models.PositiveIntegerField(
+        'Просмотры', default=0, editable=False
+    )
 
     class Meta:
-        ordering = ['-pub_date']
+        # pk различает посты с одинаковым временем, это нужно курсорам
+        ordering = ['-pub_date', '-pk']
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # views меняет только flush счётчика, а значение в объекте
+            # могло устареть, пока пост редактировали
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'views'
+            ]
+        super().save(*args, **kwargs)
+
 
 class Comment(CreatedModel):
     post = models.ForeignKey(
@@ -0,0 +1,234 @@
+"""Рекомендации «кого почитать» по графу подписок.
+
+Кандидат получает очки, если на него подписаны авторы, на которых
+подписан пользователь (друзья друзей), и если на него подписаны
+пользователи с похожими подписками (косинусная близость наборов
+подписок). Полный пересчёт идёт задачей очереди или командой
+build_recommendations: с NumPy и SciPy — разреженными матрицами,
+без них — словарями множеств. После подписки или отписки
+пересчитывается только сам пользователь.
+"""
+import math
+import time
+from collections import Counter, defaultdict
+from itertools import chain
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count
+
+from jobs.queue import enqueue
+from .models import Follow
+from .tasks import build_recommendations, refresh_recommendations
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+User = get_user_model()
+
+POPULAR_KEY = 'recommendations:popular'
+
+
+def cache_key(user_id):
+    return f'recommendations:{user_id}'
+
+
+def load_graph(user_ids=None):
+    """Подписки и подписчики; user_ids ограничивает подписчиков."""
+    following = defaultdict(set)
+    followers = defaultdict(set)
+    edges = Follow.objects.values_list('user_id', 'author_id').order_by()
+    if user_ids is not None:
+        edges = edges.filter(user_id__in=user_ids)
+    for user_id, author_id in edges.iterator():
+        following[user_id].add(author_id)
+        followers[author_id].add(user_id)
+    return following, followers
+
+
+def top(user_id, scores, following):
+    """K лучших кандидатов, кроме самого пользователя и его подписок."""
+    exclude = following.get(user_id, set()) | {user_id}
+    # округление убирает разницу в последних знаках между расчётами
+    ranked = sorted(
+        (-round(score, 9), author_id) for author_id, score in scores.items()
+        if author_id not in exclude and score > 0
+    )
+    return [
+        author_id for _, author_id in ranked[:settings.RECOMMENDATIONS_SIZE]
+    ]
+
+
+def score_user(user_id, following, followers):
+    """Рекомендации одному пользователю без NumPy.
+
+    Нужны все подписки пользователя, авторов из них и всех,
+    кто подписан на тех же авторов.
+    """
+    weights = settings.RECOMMENDATIONS_WEIGHTS
+    mine = following.get(user_id, set())
+    scores = Counter()
+    for author_id in mine:
+        for candidate in following.get(author_id, ()):
+            scores[candidate] += weights['friends']
+    shared = Counter(
+        other for author_id in mine for other in followers[author_id]
+        if other != user_id
+    )
+    for other, count in shared.items():
+        similarity = count / math.sqrt(len(mine) * len(following[other]))
+        for candidate in following[other]:
+            scores[candidate] += weights['cofollow'] * similarity
+    return top(user_id, scores, following)
+
+
+def score_all_python(following, followers):
+    for user_id in list(following):
+        yield user_id, score_user(user_id, following, followers)
+
+
+def score_all_sparse(following):
+    """Те же очки для всех сразу: F·F и (Fn·Fnᵀ)·F по частям строк.
+
+    F — разреженная матрица подписок, Fn — F со строками,
+    делёнными на корень из числа подписок.
+    """
+    weights = settings.RECOMMENDATIONS_WEIGHTS
+    ids = sorted(set(following).union(*following.values()))
+    index = {pk: number for number, pk in enumerate(ids)}
+    ids = np.array(ids)
+    rows = [index[u] for u, authors in following.items() for _ in authors]
+    cols = [index[a] for authors in following.values() for a in authors]
+    size = len(ids)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=(size, size)
+    )
+    degrees = np.asarray(matrix.sum(axis=1)).ravel()
+    scale = np.divide(
+        1, np.sqrt(degrees), out=np.zeros(size), where=degrees > 0
+    )
+    normalized = sparse.diags(scale) @ matrix
+    chunk = settings.RECOMMENDATIONS_CHUNK
+    for start in range(0, size, chunk):
+        block = slice(start, min(start + chunk, size))
+        similarity = (normalized[block] @ normalized.T).tocoo()
+        # близость пользователя с самим собой не считается
+        similarity.data[similarity.row + block.start == similarity.col] = 0
+        scores = (
+            weights['friends'] * (matrix[block] @ matrix)
+            + weights['cofollow'] * (similarity.tocsr() @ matrix)
+        ).tocsr()
+        for number in range(block.stop - block.start):
+            user_id = int(ids[block.start + number])
+            if user_id not in following:
+                continue
+            row = scores.getrow(number)
+            yield user_id, top(
+                user_id,
+                dict(zip(ids[row.indices].tolist(), row.data.tolist())),
+                following
+            )
+
+
+def popular_authors():
+    return list(User.objects.annotate(
+        followers_count=Count('following')
+    ).filter(followers_count__gt=0).order_by(
+        '-followers_count', 'pk'
+    ).values_list('pk', flat=True)[:settings.RECOMMENDATIONS_SIZE])
+
+
+def build():
+    """Пересчитывает рекомендации всех пользователей."""
+    following, followers = load_graph()
+    if sparse is not None and following:
+        results = score_all_sparse(following)
+    else:
+        results = score_all_python(following, followers)
+    # без подписок рекомендаций нет, но пустой список в кэше избавляет
+    # от пересчёта при каждом их просмотре
+    without_follows = User.objects.exclude(
+        pk__in=list(following)
+    ).values_list('pk', flat=True).iterator()
+    batch = {}
+    for user_id, authors in chain(
+        results, ((user_id, []) for user_id in without_follows)
+    ):
+        batch[cache_key(user_id)] = authors
+        if len(batch) >= settings.RECOMMENDATIONS_CHUNK:
+            cache.set_many(batch, settings.RECOMMENDATIONS_TIMEOUT)
+            batch = {}
+    cache.set_many(batch, settings.RECOMMENDATIONS_TIMEOUT)
+    cache.set(
+        POPULAR_KEY, popular_authors(), settings.RECOMMENDATIONS_TIMEOUT
+    )
+    return len(following)
+
+
+def pending_key(user_id):
+    return f'{cache_key(user_id)}:pending'
+
+
+def refresh(user_id):
+    """Пересчитывает рекомендации одного пользователя по его окрестности."""
+    # подписки, сделанные после этого момента, поставят новый пересчёт
+    cache.delete(pending_key(user_id))
+    mine = set(Follow.objects.filter(
+        user_id=user_id
+    ).values_list('author_id', flat=True))
+    others = set(Follow.objects.filter(
+        author_id__in=mine
+    ).values_list('user_id', flat=True))
+    following, followers = load_graph({user_id} | mine | others)
+    authors = score_user(user_id, following, followers)
+    cache.set(cache_key(user_id), authors, settings.RECOMMENDATIONS_TIMEOUT)
+    return authors
+
+
+def schedule_refresh(user_id):
+    """Пересчёт через RECOMMENDATIONS_REFRESH_DELAY секунд.
+
+    Пока пересчёт ждёт в очереди, новый не ставится: подписки за это
+    время он увидит, когда запустится. Если задача так и не выполнится,
+    пользователя пересчитает полный пересчёт.
+    """
+    if cache.add(pending_key(user_id), 1, settings.RECOMMENDATIONS_INTERVAL):
+        enqueue(
+            refresh_recommendations, user_id,
+            delay=settings.RECOMMENDATIONS_REFRESH_DELAY
+        )
+
+
+def schedule_build():
+    interval = settings.RECOMMENDATIONS_INTERVAL
+    window = int(time.time() // interval)
+    if cache.add(f'{POPULAR_KEY}:scheduled:{window}', 1, interval * 2):
+        enqueue(build_recommendations, key=f'recommendations:build:{window}')
+
+
+def suggestions(user, limit=None):
+    """Авторы, которых стоит предложить user, без уже подписанных.
+
+    Пока рекомендаций нет, предлагаются авторы с большим числом
+    подписчиков, а пересчёт ставится в очередь.
+    """
+    limit = limit or settings.RECOMMENDATIONS_SHOWN
+    keys = cache.get_many([cache_key(user.pk), POPULAR_KEY])
+    if POPULAR_KEY not in keys:
+        schedule_build()
+    if cache_key(user.pk) not in keys:
+        schedule_refresh(user.pk)
+    ids = keys.get(cache_key(user.pk)) or keys.get(POPULAR_KEY, [])
+    ids = [pk for pk in ids if pk != user.pk]
+    if not ids:
+        return []
+    followed = set(Follow.objects.filter(
+        user=user, author_id__in=ids
+    ).values_list('author_id', flat=True))
+    ids = [pk for pk in ids if pk not in followed][:limit]
+    users = User.objects.in_bulk(ids)
+    return [users[pk] for pk in ids if pk in users]
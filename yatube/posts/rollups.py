@@ -0,0 +1,127 @@
+"""Рейтинги «популярное за неделю» и «в тренде в группе».
+
+Рейтинги считаются задачей очереди раз в ROLLUP_INTERVAL секунд и
+лежат в общем кэше одной записью со списками id постов. Страницы только
+читают их и подгружают посты по id.
+"""
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from jobs.queue import enqueue
+from . import counts
+from .models import Comment, Follow, Post
+from .tasks import build_rollups
+
+ROLLUPS_KEY = 'rollups'
+
+
+def count_subquery(queryset, field):
+    """Число строк queryset, связанных с внешним запросом по field."""
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(field).annotate(
+                count=Count('pk')
+            ).values('count'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def post_score(comments, views, followers):
+    weights = settings.ROLLUP_WEIGHTS
+    return (
+        comments * weights['comments']
+        + views * weights['views']
+        + followers * weights['followers']
+    )
+
+
+def trending_score(score, age):
+    """Очки, убывающие с возрастом поста, как на новостных агрегаторах."""
+    hours = age.total_seconds() / 3600
+    return score / (hours + 2) ** settings.ROLLUP_GRAVITY
+
+
+def build():
+    """Пересчитывает рейтинги по постам за последние ROLLUP_WINDOW дней.
+
+    Старые посты в расчёт не попадают, поэтому время пересчёта
+    зависит от числа свежих постов, а не от размера таблицы.
+    """
+    now = timezone.now()
+    since = now - timedelta(days=settings.ROLLUP_WINDOW)
+    rows = list(Post.objects.filter(pub_date__gte=since).annotate(
+        comments_count=count_subquery(
+            Comment.objects.filter(post=OuterRef('pk')), 'post'
+        ),
+        followers_count=count_subquery(
+            Follow.objects.filter(author=OuterRef('author')), 'author'
+        ),
+    ).values_list(
+        'pk', 'group_id', 'pub_date', 'views',
+        'comments_count', 'followers_count'
+    ).order_by())
+    pending = counts.post_views.pending([row[0] for row in rows])
+    popular = []
+    trending = defaultdict(list)
+    for pk, group_id, pub_date, views, comments, followers in rows:
+        score = post_score(comments, views + pending.get(pk, 0), followers)
+        popular.append((score, pk))
+        if group_id is not None:
+            trending[group_id].append(
+                (trending_score(score, now - pub_date), pk)
+            )
+    rollups = {
+        'built': time.time(),
+        'popular': top(popular),
+        'trending': {
+            group_id: top(scores) for group_id, scores in trending.items()
+        },
+    }
+    cache.set(ROLLUPS_KEY, rollups, settings.ROLLUP_TIMEOUT)
+    return rollups
+
+
+def top(scores):
+    scores.sort(reverse=True)
+    return [pk for score, pk in scores[:settings.ROLLUP_SIZE]]
+
+
+def schedule_build():
+    """Одна задача пересчёта на интервал, в котором рейтинги читали."""
+    window = int(time.time() // settings.ROLLUP_INTERVAL)
+    if cache.add(f'{ROLLUPS_KEY}:scheduled:{window}', 1,
+                 settings.ROLLUP_INTERVAL * 2):
+        enqueue(build_rollups, key=f'{ROLLUPS_KEY}:{window}')
+
+
+def get_rollups():
+    """Рейтинги из кэша; устаревшие отдаются, пока идёт пересчёт."""
+    rollups = cache.get(ROLLUPS_KEY)
+    if rollups is None or (
+        rollups['built'] < time.time() - settings.ROLLUP_INTERVAL
+    ):
+        schedule_build()
+    return rollups or {'built': 0, 'popular': [], 'trending': {}}
+
+
+def popular_ids():
+    return get_rollups()['popular']
+
+
+def trending_ids(group_id):
+    return get_rollups()['trending'].get(group_id, [])
+
+
+def posts_by_ids(ids):
+    """Посты в порядке ids, удалённые после пересчёта пропускаются."""
+    posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+    return [posts[pk] for pk in ids if pk in posts]
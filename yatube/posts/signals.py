@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.edge import purge, purge_enabled
+from core.events import publish
+from core.thumbnails import image_metadata
+from jobs.queue import enqueue
+from . import counts, recommendations, surrogates
+from .models import Comment, Follow, Group, Post
+from .tasks import collect_image, invalidate_follow_counts
+
+
+def purge_post(post, group_ids):
+    # ключи требуют запросов в базу, поэтому без прокси не считаются
+    if purge_enabled():
+        purge(*surrogates.changed_post_keys(post, group_ids))
+
+
+@receiver(pre_save, sender=Post)
+def store_image_metadata(sender, instance, **kwargs):
+    if not instance.image:
+        instance.image_width = instance.image_height = None
+        instance.image_hash = ''
+    elif not instance.image._committed:
+        # файл только что загружен и ещё не сохранён в хранилище
+        (
+            instance.image_width,
+            instance.image_height,
+            instance.image_hash
+        ) = image_metadata(instance.image.file)
+        # хранилище возьмёт хэш для имени файла отсюда
+        instance.image.file.sha256 = instance.image_hash
+
+
+def enqueue_collect_image(name):
+    if name:
+        # файл удаляется не сразу: ссылка на него могла появиться
+        # в параллельной загрузке того же содержимого
+        enqueue(collect_image, name, delay=settings.IMAGE_GC_GRACE)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous(sender, instance, **kwargs):
+    if instance._state.adding:
+        return
+    instance._old_group_id, instance._old_image = Post.objects.filter(
+        pk=instance.pk
+    ).values_list('group_id', 'image').first() or (None, '')
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    purge_post(
+        instance,
+        {getattr(instance, '_old_group_id', None), instance.group_id}
+    )
+    if created:
+        counts.change_counts(counts.post_scopes(instance), 1)
+        publish(counts.post_scopes(instance), instance.pk)
+        enqueue(invalidate_follow_counts, instance.author_id)
+        return
+    old_image = getattr(instance, '_old_image', '')
+    if old_image != instance.image.name:
+        enqueue_collect_image(old_image)
+    old_group_id = getattr(instance, '_old_group_id', None)
+    if old_group_id != instance.group_id:
+        counts.invalidate([
+            counts.group_scope(group_id)
+            for group_id in (old_group_id, instance.group_id)
+            if group_id is not None
+        ])
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    purge_post(instance, [instance.group_id])
+    counts.change_counts(counts.post_scopes(instance), -1)
+    enqueue(invalidate_follow_counts, instance.author_id)
+    enqueue_collect_image(instance.image.name)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, signal, created=False, **kwargs):
+    counts.invalidate([counts.follow_scope(instance.user_id)])
+    if signal is post_delete:
+        counts.change_followers(instance.author_id, -1)
+    elif created:
+        counts.change_followers(instance.author_id, 1)
+    recommendations.schedule_refresh(instance.user_id)
+    if purge_enabled():
+        purge(surrogates.author_key(instance.author.username))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    purge(surrogates.post_key(instance.post_id))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    purge(surrogates.group_key(instance.slug))
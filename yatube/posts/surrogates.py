@@ -0,0 +1,51 @@
+"""Ключи Surrogate-Key, по которым прокси сбрасывает страницы постов."""
+from django.contrib.auth import get_user_model
+
+from .models import Group
+
+User = get_user_model()
+
+INDEX_KEY = 'feed-index'
+
+
+def post_key(post_id):
+    return f'post-{post_id}'
+
+
+def group_key(slug):
+    return f'group-{slug}'
+
+
+def author_key(username):
+    return f'author-{username}'
+
+
+def card_keys(post):
+    """Ключи карточки поста: она меняется вместе с автором и группой.
+
+    Автор и группа должны быть загружены через select_related.
+    """
+    keys = [post_key(post.pk), author_key(post.author.username)]
+    if post.group is not None:
+        keys.append(group_key(post.group.slug))
+    return keys
+
+
+def page_keys(page_obj):
+    return [key for post in page_obj for key in card_keys(post)]
+
+
+def changed_post_keys(post, group_ids):
+    """Ключи страниц, на которых виден пост из групп group_ids."""
+    keys = [INDEX_KEY, post_key(post.pk)]
+    keys += [
+        author_key(username) for username in User.objects.filter(
+            pk=post.author_id
+        ).values_list('username', flat=True)
+    ]
+    keys += [
+        group_key(slug) for slug in Group.objects.filter(
+            pk__in=[pk for pk in group_ids if pk is not None]
+        ).values_list('slug', flat=True)
+    ]
+    return keys
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from jobs.queue import task
+from .models import Post
+
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+def make_thumbnail(image):
+    return get_thumbnail(image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+
+
+@task
+def build_thumbnail(post_id):
+    """Заранее создаёт миниатюру картинки поста для лент."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None and post.image:
+        make_thumbnail(post.image)
+
+
+def image_refcount(name):
+    return Post.objects.filter(image=name).count()
+
+
+def collect_image_file(name):
+    """Удаляет картинку и её миниатюры, если на неё не ссылается ни
+    один пост и файл не менялся дольше IMAGE_GC_GRACE секунд.
+
+    Возвращает True, если файл удалён.
+    """
+    storage = Post._meta.get_field('image').storage
+    if not storage.exists(name) or image_refcount(name):
+        return False
+    grace = timezone.now() - timedelta(seconds=settings.IMAGE_GC_GRACE)
+    if storage.get_modified_time(name) > grace:
+        return False
+    default.backend.delete(ImageFile(name, storage))
+    return True
+
+
+@task
+def collect_image(name):
+    collect_image_file(name)
+
+
+@task
+def invalidate_follow_counts(author_id):
+    """Сбрасывает счётчики лент подписчиков автора.
+
+    Подписчиков может быть много, поэтому это делает воркер, а не
+    запрос, создавший или удаливший пост.
+    """
+    from . import counts
+    counts.invalidate(counts.follower_scopes(author_id))
+
+
+@task
+def build_rollups():
+    """Пересчитывает рейтинги популярных постов."""
+    from .rollups import build
+    build()
+
+
+@task
+def build_recommendations():
+    """Пересчитывает рекомендации «кого почитать» для всех."""
+    from .recommendations import build
+    build()
+
+
+@task
+def refresh_recommendations(user_id):
+    """Пересчитывает рекомендации пользователя после смены подписок."""
+    from .recommendations import refresh
+    refresh(user_id)
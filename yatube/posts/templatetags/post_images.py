@@ -0,0 +1,23 @@
+from django import template
+
+from core.thumbnails import stored_thumbnail
+from ..tasks import THUMBNAIL_GEOMETRY, THUMBNAIL_OPTIONS
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(post):
+    """Миниатюра картинки поста по сохранённым размерам.
+
+    Для постов без сохранённых размеров возвращает None.
+    """
+    if not post.image or not post.image_width or not post.image_height:
+        return None
+    return stored_thumbnail(
+        post.image,
+        post.image_width,
+        post.image_height,
+        THUMBNAIL_GEOMETRY,
+        **THUMBNAIL_OPTIONS
+    )
@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AdminChangelistTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@yatube.ru', password='pass'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def create_posts(self, number):
+        for post_id in range(Post.objects.count(), number):
+            post = Post.objects.create(
+                text=f'Тестовый пост {post_id}',
+                author=User.objects.create_user(username=f'user_{post_id}'),
+                group=self.group,
+            )
+            Comment.objects.create(
+                post=post, author=post.author, text='Комментарий'
+            )
+            Follow.objects.create(user=post.author, author=self.admin)
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_changelist_queries_do_not_grow(self):
+        """Число запросов в changelist не зависит от числа строк."""
+        urls = [
+            reverse('admin:posts_post_changelist'),
+            reverse('admin:posts_comment_changelist'),
+            reverse('admin:posts_follow_changelist'),
+        ]
+        self.create_posts(2)
+        queries = {url: self.changelist_queries(url) for url in urls}
+        self.create_posts(12)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.changelist_queries(url), queries[url])
@@ -0,0 +1,125 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from ..models import Group, Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class WarmCachesTest(TransactionTestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='test_author')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        self.post = Post.objects.create(
+            text='Тестовый пост',
+            author=self.author,
+            group=self.group,
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=SMALL_GIF,
+                content_type='image/gif'
+            ),
+        )
+
+    def test_warm_caches(self):
+        """Команда открывает горячие страницы и заполняет кэш главной."""
+        out = StringIO()
+        # тестовая база SQLite в памяти не пускает параллельную запись
+        # в таблицу кэша, поэтому запросы идут по одному
+        call_command(
+            'warm_caches', depth=1, concurrency=1, host='localhost',
+            stdout=out
+        )
+        output = out.getvalue()
+        for url in [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        ]:
+            with self.subTest(url=url):
+                self.assertIn(f'200 {url} ', output)
+        self.assertIn('миниатюр: 1', output)
+        client = Client(HTTP_HOST='localhost')
+        content = client.get(reverse('posts:index')).content
+        Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(client.get(reverse('posts:index')).content, content)
+
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def test_warm_caches_needs_host(self):
+        """Без имени сайта команда не прогревает кэш впустую."""
+        with self.assertRaises(CommandError):
+            call_command('warm_caches', stdout=StringIO())
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_warm_caches_needs_shared_cache(self):
+        """Кэш в памяти команды прогревать без --base-url бессмысленно."""
+        with self.assertRaises(CommandError):
+            call_command('warm_caches', host='localhost', stdout=StringIO())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_GC_GRACE=0)
+class CollectImagesTest(TransactionTestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='test_author')
+
+    def create_post(self):
+        return Post.objects.create(
+            text='Тестовый пост',
+            author=self.author,
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=SMALL_GIF,
+                content_type='image/gif'
+            ),
+        )
+
+    def collect(self):
+        call_command('collect_images', stdout=StringIO())
+
+    def test_same_image_stored_once(self):
+        """Одинаковые картинки хранятся одним файлом до удаления постов."""
+        first, second = self.create_post(), self.create_post()
+        self.assertEqual(first.image.name, second.image.name)
+        storage = first.image.storage
+        first.delete()
+        self.collect()
+        self.assertTrue(storage.exists(second.image.name))
+        second.delete()
+        self.collect()
+        self.assertFalse(storage.exists(second.image.name))
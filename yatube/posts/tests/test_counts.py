@@ -0,0 +1,201 @@
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from core.counts import count_rows
+from .. import counts
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+def process_cache():
+    """Свой экземпляр кэша из настроек, как в отдельном процессе."""
+    config = settings.CACHES['default']
+    return import_string(config['BACKEND'])(config.get('LOCATION', ''), config)
+
+
+# запросы к кэшу в базе не мешают считать запросы к таблицам постов
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+}})
+class PostsCountTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.follower = User.objects.create_user(username='test_follower')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(
+            text='Тестовый пост',
+            author=cls.author,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def count(self, scope, queryset):
+        return counts.posts_count(scope, queryset)
+
+    def test_count_updated_on_create_and_delete(self):
+        """Счётчики лент меняются при создании и удалении поста."""
+        scopes = {
+            counts.INDEX_SCOPE: Post.objects.all(),
+            counts.group_scope(self.group.pk): self.group.posts.all(),
+            counts.author_scope(self.author.pk): self.author.posts.all(),
+        }
+        for scope, queryset in scopes.items():
+            self.assertEqual(self.count(scope, queryset), 1)
+        post = Post.objects.create(
+            text='Новый пост',
+            author=self.author,
+            group=self.group,
+        )
+        for scope, queryset in scopes.items():
+            with self.subTest(scope=scope):
+                with self.assertNumQueries(0):
+                    self.assertEqual(self.count(scope, queryset), 2)
+        post.delete()
+        for scope, queryset in scopes.items():
+            with self.subTest(scope=scope):
+                self.assertEqual(self.count(scope, queryset), 1)
+
+    def test_group_change_invalidates_count(self):
+        """Смена группы у поста сбрасывает счётчики обеих групп."""
+        group = Group.objects.create(
+            title='Другая группа',
+            slug='other',
+            description='Тестовое описание',
+        )
+        scope = counts.group_scope(group.pk)
+        self.assertEqual(self.count(scope, group.posts.all()), 0)
+        post = self.author.posts.first()
+        post.group = group
+        post.save()
+        self.assertEqual(self.count(scope, group.posts.all()), 1)
+
+    def test_follow_invalidates_count(self):
+        """Подписка сбрасывает счётчик ленты подписок."""
+        scope = counts.follow_scope(self.follower.pk)
+        posts = Post.objects.filter(author__following__user=self.follower)
+        self.assertEqual(self.count(scope, posts), 0)
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.assertEqual(self.count(scope, posts), 1)
+        # подписчиков автора перебирает задача очереди, а не запрос
+        with CaptureQueriesContext(connection) as queries:
+            Post.objects.create(text='Новый пост', author=self.author)
+        self.assertFalse([
+            query for query in queries if 'posts_follow' in query['sql']
+        ])
+        call_command('run_jobs', processes=0, once=True, stdout=StringIO())
+        self.assertEqual(self.count(scope, posts), 2)
+
+    @override_settings(COUNT_ESTIMATE_THRESHOLD=1)
+    def test_count_rows_uses_estimate(self):
+        """Для больших таблиц берётся оценка из статистики СУБД."""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(count_rows(Post.objects.all()), 1)
+        self.assertEqual(count_rows(self.author.posts.all()), 2)
+
+
+class PostViewsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='test_author')
+        cls.post = Post.objects.create(text='Пост', author=author)
+        cls.other = Post.objects.create(text='Другой пост', author=author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_views_buffered(self):
+        """Просмотры копятся в кэше и переносятся в базу одним UPDATE."""
+        for _ in range(2):
+            counts.post_views.incr(self.post.pk)
+            counts.post_views.incr(self.other.pk)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 0)
+        self.assertEqual(counts.post_views.get(self.post), 2)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(counts.post_views.flush(), 2)
+        updates = [
+            query for query in queries
+            if query['sql'].startswith('UPDATE "posts_post"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.post.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.post.views, self.other.views), (2, 2))
+        self.assertEqual(counts.post_views.get(self.post), 2)
+        self.assertEqual(counts.post_views.flush(), 0)
+
+    def test_views_after_flush(self):
+        """Просмотры после flush попадают в следующий."""
+        counts.post_views.incr(self.post.pk)
+        counts.post_views.flush()
+        counts.post_views.incr(self.post.pk, 2)
+        self.assertEqual(counts.post_views.flush(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 3)
+
+    def test_flush_in_worker(self):
+        """Прибавки из веб-процесса переносит в базу воркер очереди."""
+        with mock.patch('core.counters.cache', process_cache()):
+            counts.post_views.incr(self.post.pk, 5)
+        with mock.patch('core.counters.cache', process_cache()):
+            self.assertEqual(counts.post_views.flush(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 5)
+
+    def test_edit_keeps_flushed_views(self):
+        """Сохранение поста не затирает перенесённые просмотры."""
+        post = Post.objects.get(pk=self.post.pk)
+        counts.post_views.incr(self.post.pk, 5)
+        counts.post_views.flush()
+        post.text = 'Изменённый пост'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual((post.text, post.views), ('Изменённый пост', 5))
+
+    @override_settings(JOBS_EAGER=True, COUNTERS_FLUSH_INTERVAL=3600)
+    def test_flush_scheduled(self):
+        """Первый просмотр в интервале ставит задачу flush."""
+        counts.post_views.incr(self.post.pk)
+        counts.post_views.incr(self.post.pk)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 1)
+        self.assertEqual(counts.post_views.get(self.post), 2)
+
+    def test_view_beacon(self):
+        """Страница поста сообщает о просмотре POST-запросом."""
+        url = reverse('posts:post_view', args=[self.post.pk])
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertEqual(self.client.post(url).status_code, 204)
+        self.assertEqual(
+            self.client.post(
+                reverse('posts:post_view', args=[0])
+            ).status_code,
+            404
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertEqual(response.context['views_count'], 1)
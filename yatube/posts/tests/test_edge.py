@@ -0,0 +1,122 @@
+import json
+
+import requests
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (Client, LiveServerTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+
+from core.edge import batched_purge
+from core.tests.edge_proxy import EdgeProxy
+from jobs.models import Job
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class EdgeHeadersTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Текст'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous(self):
+        """Страницы для анонимов кэширует прокси, с ключами сброса."""
+        pages = {
+            reverse('posts:index'): 'feed-index',
+            reverse('posts:group_list', args=['group']): 'group-group',
+            reverse('posts:profile', args=['author']): 'author-author',
+            reverse('posts:post_detail', args=[self.post.pk]): None,
+        }
+        for url, key in pages.items():
+            with self.subTest(url=url):
+                response = Client().get(url)
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn('s-maxage', response['Cache-Control'])
+                self.assertIn('Cookie', response['Vary'])
+                keys = response['Surrogate-Key'].split()
+                self.assertIn(f'post-{self.post.pk}', keys)
+                self.assertIn('group-group', keys)
+                self.assertIn('author-author', keys)
+                if key is not None:
+                    self.assertIn(key, keys)
+
+    def test_authenticated(self):
+        """Страницы для вошедших пользователей прокси не кэширует."""
+        client = Client()
+        client.force_login(self.author)
+        response = client.get(reverse('posts:profile', args=['author']))
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotIn('public', response['Cache-Control'])
+
+
+@override_settings(EDGE_PURGE_URL='http://edge/purge')
+class BatchedPurgeTest(TransactionTestCase):
+
+    def test_batch(self):
+        """Изменения внутри batched_purge сбрасываются одной задачей."""
+        author = User.objects.create_user(username='author')
+        with batched_purge():
+            posts = [
+                Post.objects.create(author=author, text=str(number))
+                for number in range(3)
+            ]
+            Comment.objects.create(post=posts[0], author=author, text='!')
+        job = Job.objects.get(task='core.tasks.purge_surrogate_keys')
+        keys, = json.loads(job.args)
+        self.assertEqual(
+            keys,
+            sorted(['feed-index', 'author-author'] + [
+                f'post-{post.pk}' for post in posts
+            ])
+        )
+
+
+@override_settings(JOBS_EAGER=True)
+class EdgeProxyTest(LiveServerTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.proxy = EdgeProxy(self.live_server_url)
+        self.proxy.start()
+        settings = override_settings(EDGE_PURGE_URL=f'{self.proxy.url}/purge')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Текст')
+
+    def tearDown(self):
+        self.proxy.stop()
+
+    def get(self, url):
+        return requests.get(self.proxy.url + url)
+
+    def test_purge(self):
+        """Новый комментарий сбрасывает только страницы с этим постом."""
+        User.objects.create_user(username='other')
+        post_url = reverse('posts:post_detail', args=[self.post.pk])
+        profile_url = reverse('posts:profile', args=['other'])
+        for url in (post_url, profile_url):
+            self.assertEqual(self.get(url).headers['X-Cache'], 'MISS')
+            self.assertEqual(self.get(url).headers['X-Cache'], 'HIT')
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий'
+        )
+        self.assertEqual(
+            self.proxy.purges[-1], [f'post-{self.post.pk}']
+        )
+        response = self.get(post_url)
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+        self.assertIn('Комментарий', response.text)
+        self.assertEqual(self.get(profile_url).headers['X-Cache'], 'HIT')
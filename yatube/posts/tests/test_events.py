@@ -0,0 +1,90 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.events import last_seq
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class NewPostsEventsTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.post = Post.objects.create(author=self.author, text='Старый')
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.after = last_seq()
+
+    def events(self, url):
+        response = self.client.get(url, {'after': self.after})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response.content.decode()
+
+    def test_new_posts(self):
+        """Ленты сообщают о постах, созданных после первой страницы."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        urls = {
+            'index': reverse('posts:index_events'),
+            'group': reverse('posts:group_events', args=['group']),
+            'follow': reverse('posts:follow_events'),
+        }
+        for url in urls.values():
+            self.assertNotIn('event: posts', self.events(url))
+        Post.objects.create(author=self.author, text='Новый')
+        Post.objects.create(
+            author=self.reader, group=self.group, text='В группе'
+        )
+        for feed, count in (('index', 2), ('group', 1), ('follow', 1)):
+            with self.subTest(feed=feed):
+                self.assertIn(
+                    f'data: {{"count": {count}, "more": false}}',
+                    self.events(urls[feed])
+                )
+
+    def test_events_url(self):
+        """Первая страница ленты подписывается на новые посты."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {number}')
+            for number in range(settings.PAGE_POST)
+        )
+        Post.objects.create(author=self.author, text='Новый')
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(
+            response.context['events_url'],
+            f'{reverse("posts:index_events")}?after={self.after + 1}'
+        )
+        response = self.client.get(reverse('posts:index'), {'page': 2})
+        self.assertIsNone(response.context['events_url'])
+
+    def test_follow_events_without_new_posts(self):
+        """Без новых событий подписки читателя не запрашиваются."""
+        for number in range(3):
+            Follow.objects.create(
+                user=self.reader,
+                author=User.objects.create_user(username=f'author{number}')
+            )
+        self.after = last_seq()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertNotIn(
+                'event: posts', self.events(reverse('posts:follow_events'))
+            )
+        self.assertFalse([
+            query for query in queries if 'posts_follow' in query['sql']
+        ])
+
+    def test_bad_after(self):
+        """Без ?after= запрос отклоняется."""
+        response = self.client.get(reverse('posts:index_events'))
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
@@ -1,5 +1,7 @@
 import shutil
 import tempfile
+from http import HTTPStatus
+from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -78,7 +80,28 @@ class PostFormTests(TestCase):
         self.assertEqual(post.author, form_data['author'])
         self.assertEqual(post.group.id, form_data['group'])
         self.assertTrue(
-            Post.objects.filter(image='posts/test.gif').exists()
+            Post.objects.filter(
+                image=f'posts/{post.image_hash[:2]}/{post.image_hash}.gif'
+            ).exists()
+        )
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertEqual(len(post.image_hash), 64)
+
+    def test_image_hashed_once(self):
+        """Хэш картинки считается один раз и идёт в имя файла."""
+        uploaded = SimpleUploadedFile(
+            name='once.gif',
+            content=self.test_image + b'once',
+            content_type='image/gif'
+        )
+        with mock.patch('core.storage.hashlib') as hashlib:
+            post = Post.objects.create(
+                text='Пост с картинкой', author=self.author, image=uploaded
+            )
+        hashlib.sha256.assert_not_called()
+        self.assertEqual(
+            post.image.name,
+            f'posts/{post.image_hash[:2]}/{post.image_hash}.gif'
         )
 
     def test_edit_post(self):
@@ -171,6 +194,35 @@ class CommentFormTests(TestCase):
         self.assertEqual(comment.text, form_data['text'])
         self.assertEqual(comment.author, form_data['author'])
 
+    def test_ajax_comment(self):
+        """AJAX-комментарий возвращает фрагмент с новым комментарием."""
+        response = self.authorized_author.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            data={'text': 'Комментарий без перезагрузки'},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertTemplateUsed(response, 'posts/includes/comment.html')
+        self.assertContains(
+            response, 'Комментарий без перезагрузки',
+            status_code=HTTPStatus.CREATED
+        )
+        self.assertTrue(
+            self.post.comments.filter(
+                text='Комментарий без перезагрузки'
+            ).exists()
+        )
+
+    def test_ajax_comment_invalid(self):
+        """AJAX-комментарий с ошибкой возвращает ошибки формы."""
+        response = self.authorized_author.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            data={'text': ''},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('text', response.json()['errors'])
+
     def test_guest_cant_create_comment(self):
         """Неавторизированный пользователь не создаёт комментарий."""
         post = self.post
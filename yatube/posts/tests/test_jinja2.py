@@ -0,0 +1,80 @@
+import re
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Group, Post
+
+try:
+    import jinja2
+except ImportError:
+    jinja2 = None
+
+User = get_user_model()
+
+FEED_VIEWS = [
+    'posts:index', 'posts:group_list', 'posts:profile', 'posts:follow_index'
+]
+
+
+def main_content(response):
+    """Содержимое <main> без различий в пробелах и CSRF-токенах."""
+    html = response.content.decode()
+    html = html[html.index('<main>'):html.index('</main>')]
+    html = re.sub(
+        r'name="csrfmiddlewaretoken" value="[^"]*"',
+        'name="csrfmiddlewaretoken" value=""', html
+    )
+    return re.sub(r'\s+', ' ', re.sub(r'>\s+<', '><', html)).strip()
+
+
+@unittest.skipIf(jinja2 is None, 'Jinja2 не установлен')
+class Jinja2FeedTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост <{number}>')
+            for number in range(25)
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def render_both(self, url):
+        cache.clear()
+        django_response = self.client.get(url)
+        cache.clear()
+        with override_settings(JINJA2_VIEWS=FEED_VIEWS):
+            jinja2_response = self.client.get(url)
+        return django_response, jinja2_response
+
+    def test_same_html(self):
+        """Ленты в Jinja2 совпадают с лентами в шаблонах Django."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=['group']) + '?page=2',
+            reverse('posts:profile', args=['author']),
+            reverse('posts:follow_index') + '?page=3',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                django_response, jinja2_response = self.render_both(url)
+                self.assertEqual(jinja2_response.templates, [])
+                self.assertEqual(
+                    main_content(jinja2_response),
+                    main_content(django_response)
+                )
+                self.assertIn('Пост &lt;', main_content(jinja2_response))
@@ -0,0 +1,143 @@
+import unittest
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from jobs.models import Job
+from .. import recommendations
+from ..models import Follow
+from .test_counts import process_cache
+
+User = get_user_model()
+
+
+class RecommendationsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('me', 'a', 'b', 'c', 'd', 'x', 'new')
+        }
+        Follow.objects.bulk_create(
+            Follow(user=cls.users[user], author=cls.users[author])
+            for user, author in (
+                ('me', 'a'), ('me', 'b'),
+                ('a', 'c'), ('b', 'c'), ('b', 'd'),
+                ('x', 'a'), ('x', 'b'), ('x', 'd'),
+            )
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def ids(self, *names):
+        return [self.users[name].pk for name in names]
+
+    def test_build(self):
+        """Друзья друзей и похожие подписчики дают рекомендации."""
+        recommendations.build()
+        me = self.users['me']
+        self.assertEqual(
+            cache.get(recommendations.cache_key(me.pk)), self.ids('c', 'd')
+        )
+        self.assertEqual(
+            cache.get(recommendations.POPULAR_KEY),
+            self.ids('a', 'b', 'c', 'd')
+        )
+
+    def test_build_without_follows(self):
+        """Без подписок пересчёт не ставится при каждом просмотре."""
+        recommendations.build()
+        new = self.users['new']
+        self.assertEqual(cache.get(recommendations.cache_key(new.pk)), [])
+        self.assertEqual(
+            [user.username for user in recommendations.suggestions(new)],
+            ['a', 'b', 'c', 'd']
+        )
+        self.assertFalse(Job.objects.exists())
+
+    def test_refresh_matches_build(self):
+        """Пересчёт одного пользователя совпадает с полным пересчётом."""
+        recommendations.build()
+        built = {
+            user.pk: cache.get(recommendations.cache_key(user.pk))
+            for user in self.users.values()
+        }
+        for name, user in self.users.items():
+            with self.subTest(user=name):
+                if built[user.pk] is not None:
+                    self.assertEqual(
+                        recommendations.refresh(user.pk), built[user.pk]
+                    )
+
+    @unittest.skipIf(recommendations.sparse is None, 'SciPy не установлен')
+    def test_sparse_matches_python(self):
+        """Матричный расчёт совпадает с расчётом на словарях."""
+        following, followers = recommendations.load_graph()
+        self.assertEqual(
+            dict(recommendations.score_all_sparse(following)),
+            dict(recommendations.score_all_python(following, followers))
+        )
+
+    def test_suggestions(self):
+        """Новичку предлагаются популярные авторы, подписки — нет."""
+        new = self.users['new']
+        self.assertEqual(recommendations.suggestions(new), [])
+        self.assertEqual(
+            set(Job.objects.values_list('task', flat=True)),
+            {
+                'posts.tasks.build_recommendations',
+                'posts.tasks.refresh_recommendations',
+            }
+        )
+        recommendations.build()
+        Follow.objects.create(user=new, author=self.users['a'])
+        self.assertEqual(
+            [user.username for user in recommendations.suggestions(new)],
+            ['b', 'c', 'd']
+        )
+
+    def test_follow_schedules_refresh(self):
+        """Подписка ставит пересчёт рекомендаций подписчика."""
+        Follow.objects.create(user=self.users['new'], author=self.users['c'])
+        job = Job.objects.get()
+        self.assertEqual(job.task, 'posts.tasks.refresh_recommendations')
+        self.assertEqual(job.args, f'[{self.users["new"].pk}]')
+
+    def test_refresh_scheduled_once(self):
+        """Пересчёт не ставится, пока он ждёт в очереди или уже готов."""
+        new = self.users['new']
+        refreshes = Job.objects.filter(
+            task='posts.tasks.refresh_recommendations'
+        )
+        with mock.patch('posts.recommendations.cache', process_cache()):
+            recommendations.suggestions(new)
+            recommendations.suggestions(new)
+        self.assertEqual(refreshes.count(), 1)
+        with mock.patch('posts.recommendations.cache', process_cache()):
+            recommendations.refresh(new.pk)
+        with mock.patch('posts.recommendations.cache', process_cache()):
+            recommendations.suggestions(new)
+        self.assertEqual(refreshes.count(), 1)
+        Follow.objects.create(user=new, author=self.users['a'])
+        self.assertEqual(refreshes.count(), 2)
+
+    def test_shown_on_pages(self):
+        """Рекомендации видны в профиле и в ленте подписок."""
+        recommendations.build()
+        self.client.force_login(self.users['me'])
+        for url in (
+            reverse('posts:profile', args=['a']),
+            reverse('posts:follow_index'),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    response.context['suggestions'],
+                    [self.users['c'], self.users['d']]
+                )
+                self.assertContains(response, 'Кого почитать')
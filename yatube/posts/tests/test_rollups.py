@@ -0,0 +1,107 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs.models import Job
+from .. import rollups
+from ..models import Comment, Follow, Group, Post
+from .test_counts import process_cache
+
+User = get_user_model()
+
+
+class RollupsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.star = User.objects.create_user(username='star')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.quiet = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тихий пост'
+        )
+        cls.discussed = Post.objects.create(
+            author=cls.author, group=cls.group, text='Обсуждаемый пост'
+        )
+        cls.starred = Post.objects.create(
+            author=cls.star, text='Пост звезды'
+        )
+        cls.old = Post.objects.create(author=cls.author, text='Старый пост')
+        Post.objects.filter(pk=cls.old.pk).update(
+            pub_date=timezone.now() - timedelta(days=30), views=1000
+        )
+        Comment.objects.bulk_create(
+            Comment(post=cls.discussed, author=cls.star, text='Комментарий')
+            for _ in range(3)
+        )
+        Follow.objects.bulk_create(
+            Follow(user=User.objects.create_user(username=f'fan{number}'),
+                   author=cls.star)
+            for number in range(4)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_build(self):
+        """Рейтинги учитывают комментарии, подписчиков и просмотры."""
+        built = rollups.build()
+        self.assertEqual(
+            built['popular'],
+            [self.discussed.pk, self.starred.pk, self.quiet.pk]
+        )
+        self.assertEqual(
+            built['trending'],
+            {self.group.pk: [self.discussed.pk, self.quiet.pk]}
+        )
+
+    def test_pending_views(self):
+        """Не перенесённые в базу просмотры тоже идут в рейтинг."""
+        for _ in range(20):
+            rollups.counts.post_views.incr(self.quiet.pk)
+        self.assertEqual(rollups.build()['popular'][0], self.quiet.pk)
+
+    def test_build_in_worker(self):
+        """Рейтинги, посчитанные воркером, видит веб-процесс."""
+        with mock.patch('posts.rollups.cache', process_cache()):
+            rollups.build()
+        with mock.patch('posts.rollups.cache', process_cache()):
+            self.assertEqual(rollups.popular_ids()[0], self.discussed.pk)
+        self.assertFalse(
+            Job.objects.filter(task='posts.tasks.build_rollups').exists()
+        )
+
+    def test_read_schedules_build(self):
+        """Чтение без свежих рейтингов ставит одну задачу пересчёта."""
+        self.assertEqual(rollups.popular_ids(), [])
+        self.assertEqual(rollups.trending_ids(self.group.pk), [])
+        self.assertEqual(
+            Job.objects.filter(task='posts.tasks.build_rollups').count(), 1
+        )
+
+    @override_settings(POPULAR_SIDEBAR_SIZE=1)
+    def test_views(self):
+        """Страницы рейтингов и боковая колонка показывают посты."""
+        rollups.build()
+        response = self.client.get(reverse('posts:popular'))
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.discussed, self.starred, self.quiet]
+        )
+        response = self.client.get(
+            reverse('posts:group_trending', args=['group'])
+        )
+        self.assertEqual(
+            list(response.context['page_obj']), [self.discussed, self.quiet]
+        )
+        response = self.client.get(reverse('posts:popular_sidebar'))
+        self.assertEqual(response.context['posts'], [self.discussed])
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, reverse('posts:popular_sidebar'))
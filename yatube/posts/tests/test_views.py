@@ -1,5 +1,7 @@
+import re
 import shutil
 import tempfile
+from http import HTTPStatus
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -7,9 +9,14 @@ from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase, Client, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from django import forms
+from sorl.thumbnail import get_thumbnail
+
+from core.paginator import CachedCountPaginator
 
 from ..models import Group, Post, Follow
+from ..templatetags.post_images import post_thumbnail
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -174,6 +181,24 @@ class PostViewTests(TestCase):
         post = response.context['post']
         self.assertEqual(post.image, self.post.image)
 
+    def test_stored_thumbnail(self):
+        """Миниатюра по сохранённым размерам совпадает с sorl."""
+        thumbnail = get_thumbnail(
+            self.post.image, '960x339', crop='center', upscale=True
+        )
+        stored = post_thumbnail(self.post)
+        self.assertEqual(stored.url, thumbnail.url)
+        self.assertEqual(
+            (stored.width, stored.height),
+            (thumbnail.width, thumbnail.height)
+        )
+
+    def test_image_lazy(self):
+        """Картинки в ленте грузятся лениво и с размерами."""
+        response = self.authorized_author.get(reverse('posts:index'))
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, 'width="960" height="339"')
+
 
 class PaginatorViewsTest(TestCase):
 
@@ -220,6 +245,28 @@ class PaginatorViewsTest(TestCase):
                 response = self.authorized_author.get(reverse_name + '?page=2')
                 self.assertEqual(len(response.context['page_obj']), 3)
 
+    def test_elided_page_range(self):
+        """Пагинатор выводит только соседние и крайние страницы."""
+        paginator = CachedCountPaginator(range(1000), 10)
+        ellipsis = paginator.ELLIPSIS
+        self.assertEqual(
+            list(paginator.get_elided_page_range(50)),
+            [1, ellipsis, 48, 49, 50, 51, 52, ellipsis, 100]
+        )
+        self.assertEqual(
+            list(paginator.get_elided_page_range(1)),
+            [1, 2, 3, ellipsis, 100]
+        )
+
+    def test_count_from_cache(self):
+        """Общее число постов берётся из кэша."""
+        paginator = CachedCountPaginator(
+            Post.objects.all(), 10, cache_key='test_count'
+        )
+        cache.set('test_count', 500)
+        self.assertEqual(paginator.num_pages, 50)
+        self.assertEqual(len(paginator.page(2)), 3)
+
 
 class CacheTest(TestCase):
     @classmethod
@@ -269,10 +316,11 @@ class FollowViewsTest(TestCase):
         self.authorized_author.force_login(self.author)
         self.authorized_follower = Client()
         self.authorized_follower.force_login(self.follower)
+        cache.clear()
 
     def test_follow(self):
         """Авторизованный пользователь может подписываться на авторов."""
-        self.authorized_follower.get(
+        self.authorized_follower.post(
             reverse(
                 'posts:profile_follow',
                 args={self.author.username}
@@ -287,7 +335,7 @@ class FollowViewsTest(TestCase):
     def test_unfollow(self):
         """Авторизованный пользователь может отписываться от авторов."""
         Follow.objects.create(user=self.follower, author=self.author)
-        self.authorized_follower.get(
+        self.authorized_follower.post(
             reverse(
                 'posts:profile_unfollow',
                 args={self.author.username}
@@ -299,6 +347,63 @@ class FollowViewsTest(TestCase):
         ).count()
         self.assertEqual(follow_count, 0)
 
+    def test_follow_requires_post(self):
+        """GET подписку не меняет: его может отправить чужой сайт."""
+        for name in ('posts:profile_follow', 'posts:profile_unfollow'):
+            with self.subTest(name=name):
+                response = self.authorized_follower.get(
+                    reverse(name, args=[self.author.username])
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.METHOD_NOT_ALLOWED
+                )
+        self.assertFalse(Follow.objects.filter(
+            user=self.follower, author=self.author
+        ).exists())
+
+    @override_settings(
+        RATELIMIT_ENABLE=True, RATELIMITS={'profile_follow': '2/m'}
+    )
+    def test_follow_ratelimit(self):
+        """Подписки и отписки ограничены по частоте вместе."""
+        statuses = [
+            self.authorized_follower.post(
+                reverse(name, args=[self.author.username])
+            ).status_code
+            for name in (
+                'posts:profile_follow', 'posts:profile_unfollow',
+                'posts:profile_follow',
+            )
+        ]
+        self.assertEqual(statuses[-1], HTTPStatus.TOO_MANY_REQUESTS)
+
+    def test_ajax_follow(self):
+        """AJAX-подписка возвращает новое состояние и число подписчиков."""
+        for name, following, followers in (
+            ('posts:profile_follow', True, 1),
+            ('posts:profile_follow', True, 1),
+            ('posts:profile_unfollow', False, 0),
+        ):
+            with self.subTest(name=name, following=following):
+                response = self.authorized_follower.post(
+                    reverse(name, args=[self.author.username]),
+                    HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(response.json(), {
+                    'following': following,
+                    'followers_count': followers,
+                })
+
+    def test_profile_followers_count(self):
+        """На странице автора показано число подписчиков."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        response = self.authorized_follower.get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        self.assertEqual(response.context['followers_count'], 1)
+        self.assertContains(response, 'data-followers-count>1<')
+
     def test_post_in_follower_index(self):
         """Новая запись автора появляется в ленте подписчиков."""
         post = Post.objects.create(
@@ -323,3 +428,62 @@ class FollowViewsTest(TestCase):
         response = authorized_user.get(reverse('posts:follow_index'))
         posts = response.context['posts']
         self.assertNotIn(post, posts)
+
+
+class FeedBatchTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост {number}')
+            for number in range(25)
+        )
+        # одинаковое время проверяет, что курсор различает посты по pk
+        Post.objects.update(pub_date=timezone.now())
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def load_all(self, url):
+        """Тексты постов из всех порций, начиная с первой страницы."""
+        response = self.client.get(url)
+        texts = [post.text for post in response.context['page_obj']]
+        batch_url = re.search(
+            r'data-batch-url="([^"]+)"', response.content.decode()
+        ).group(1)
+        while batch_url:
+            response = self.client.get(batch_url)
+            texts += re.findall(
+                r'<p>(Пост \d+)</p>', response.content.decode()
+            )
+            cursor = response.get('X-Next-Cursor')
+            batch_url = cursor and f'{batch_url.split("?")[0]}?cursor={cursor}'
+        return texts
+
+    def test_batches(self):
+        """Порции продолжают первую страницу без повторов и пропусков."""
+        expected = list(Post.objects.values_list('text', flat=True))
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=['group']),
+            reverse('posts:profile', args=['author']),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.load_all(url), expected)
+
+    def test_invalid_cursor(self):
+        """Неверный курсор — 404."""
+        response = self.client.get(
+            reverse('posts:index_batch') + '?cursor=abc'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_follow_batch_login_required(self):
+        """Порции ленты подписок доступны только вошедшим."""
+        response = self.client.get(reverse('posts:follow_batch'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
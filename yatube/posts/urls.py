@@ -6,13 +6,44 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('batch/', views.index_batch, name='index_batch'),
+    path('events/', views.index_events, name='index_events'),
+    path('popular/', views.popular, name='popular'),
+    path(
+        'popular/sidebar/',
+        views.popular_sidebar,
+        name='popular_sidebar'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('posts/<int:post_id>/view/', views.post_view, name='post_view'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path(
+        'group/<slug:slug>/batch/',
+        views.group_batch,
+        name='group_batch'
+    ),
+    path(
+        'group/<slug:slug>/events/',
+        views.group_events,
+        name='group_events'
+    ),
+    path(
+        'group/<slug:slug>/trending/',
+        views.group_trending,
+        name='group_trending'
+    ),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/comment', views.add_comment, name='add_comment'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/batch/', views.follow_batch, name='follow_batch'),
+    path('follow/events/', views.follow_events, name='follow_events'),
+    path(
+        'profile/<str:username>/batch/',
+        views.profile_batch,
+        name='profile_batch'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
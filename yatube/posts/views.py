@@ -1,51 +1,103 @@
+from functools import partial
+from http import HTTPStatus
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator
+from django.core.paginator import InvalidPage
+from django.http import (Http404, HttpResponse, HttpResponseBadRequest,
+                         JsonResponse)
 from django.shortcuts import get_object_or_404, render, redirect
-from django.views.decorators.cache import cache_page
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from core.cache import cache_page_single_flight
+from core.edge import add_surrogate_keys, edge_cache
+from core.events import events_after, last_seq, sse_response
+from core.paginator import CachedCountPaginator, CursorPaginator
+from core.ratelimit import ratelimit
+from core.resilience import stale_if_error
+from core.templating import template_engine
+from jobs.queue import enqueue
 
+from . import counts, recommendations, rollups, surrogates
 from .forms import PostForm, CommentForm
 from .models import Group, Post, Follow
+from .tasks import build_thumbnail
 
 User = get_user_model()
 
 
-def paginator(request, posts):
-    paginator = Paginator(posts, settings.PAGE_POST)
+def paginator(request, posts, scope):
+    paginator = CachedCountPaginator(
+        posts,
+        settings.PAGE_POST,
+        count_func=partial(counts.posts_count, scope, posts)
+    )
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
 
 
-@cache_page(20)
+def events_url(page_obj, name, *args):
+    """Адрес уведомлений о постах новее первой страницы ленты."""
+    if page_obj.number != 1:
+        return None
+    return f'{reverse(name, args=args)}?after={last_seq()}'
+
+
+@edge_cache
+@stale_if_error
+@cache_page_single_flight(20)
 def index(request):
-    posts = Post.objects.all()
-    page_obj = paginator(request, posts)
+    posts = Post.objects.select_related('author', 'group')
+    page_obj = paginator(request, posts, counts.INDEX_SCOPE)
     context = {
         'posts': posts,
         'page_obj': page_obj,
+        'batch_url': reverse('posts:index_batch'),
+        'events_url': events_url(page_obj, 'posts:index_events'),
     }
-    return render(request, 'posts/index.html', context)
+    response = render(
+        request, 'posts/index.html', context,
+        using=template_engine(request)
+    )
+    return add_surrogate_keys(
+        response, surrogates.INDEX_KEY, *surrogates.page_keys(page_obj)
+    )
 
 
+@edge_cache
+@stale_if_error
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = paginator(request, posts)
+    posts = group.posts.select_related('author', 'group')
+    page_obj = paginator(request, posts, counts.group_scope(group.pk))
     context = {
         'group': group,
         'posts': posts,
         'page_obj': page_obj,
+        'batch_url': reverse('posts:group_batch', args=[slug]),
+        'events_url': events_url(page_obj, 'posts:group_events', slug),
     }
-    return render(request, 'posts/group_list.html', context)
+    response = render(
+        request, 'posts/group_list.html', context,
+        using=template_engine(request)
+    )
+    return add_surrogate_keys(
+        response, surrogates.group_key(slug), *surrogates.page_keys(page_obj)
+    )
 
 
+@edge_cache
+@stale_if_error
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    posts_count = posts.count()
-    page_obj = paginator(request, posts)
+    posts = author.posts.select_related('author', 'group')
+    scope = counts.author_scope(author.pk)
+    posts_count = counts.posts_count(scope, posts)
+    page_obj = paginator(request, posts, scope)
 
     user = request.user
     following = user.is_authenticated and Follow.objects.filter(
@@ -59,26 +111,209 @@ def profile(request, username):
         'author': author,
         'page_obj': page_obj,
         'following': following,
-        'is_author': is_author
+        'followers_count': counts.followers_count(author.pk),
+        'is_author': is_author,
+        'suggestions': (
+            recommendations.suggestions(user) if user.is_authenticated
+            else []
+        ),
+        'batch_url': reverse('posts:profile_batch', args=[username]),
     }
-    return render(request, 'posts/profile.html', context)
+    response = render(
+        request, 'posts/profile.html', context,
+        using=template_engine(request)
+    )
+    return add_surrogate_keys(
+        response,
+        surrogates.author_key(username),
+        *surrogates.page_keys(page_obj)
+    )
 
 
+@edge_cache
+@stale_if_error
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    posts_count = post.author.posts.all().count()
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    )
+    posts_count = counts.posts_count(
+        counts.author_scope(post.author_id),
+        post.author.posts.all()
+    )
     form = CommentForm()
     comments = post.comments.all()
     context = {
         'post': post,
         'posts_count': posts_count,
         'form': form,
-        'comments': comments
+        'comments': comments,
+        'views_count': counts.post_views.get(post),
     }
-    return render(request, 'posts/post_detail.html', context)
+    response = render(request, 'posts/post_detail.html', context)
+    return add_surrogate_keys(response, *surrogates.card_keys(post))
+
+
+@csrf_exempt
+@require_POST
+@ratelimit('post_view', key='ip')
+def post_view(request, post_id):
+    """Засчитывает просмотр, о котором сообщила открытая страница поста.
+
+    Страницы постов кэширует прокси, поэтому просмотры считает
+    не post_detail, а этот запрос из navigator.sendBeacon.
+    """
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    counts.post_views.incr(post_id)
+    return HttpResponse(status=HTTPStatus.NO_CONTENT)
+
+
+def render_batch(request, posts):
+    """Только карточки постов после курсора из ?cursor=.
+
+    Подгружаются кнопкой «Показать ещё», курсор следующей порции
+    передаётся в заголовке X-Next-Cursor.
+    """
+    paginator = CursorPaginator(posts, settings.FEED_BATCH_SIZE)
+    try:
+        batch = paginator.page(request.GET.get('cursor'))
+    except InvalidPage:
+        raise Http404
+    response = render(
+        request, 'posts/includes/posts.html', {'page_obj': batch},
+        using=template_engine(request)
+    )
+    if batch.next_cursor is not None:
+        response['X-Next-Cursor'] = batch.next_cursor
+    return add_surrogate_keys(response, *surrogates.page_keys(batch))
+
+
+@edge_cache
+@cache_page_single_flight(settings.FEED_BATCH_TIMEOUT)
+def index_batch(request):
+    response = render_batch(
+        request, Post.objects.select_related('author', 'group')
+    )
+    return add_surrogate_keys(response, surrogates.INDEX_KEY)
+
+
+@edge_cache
+@cache_page_single_flight(settings.FEED_BATCH_TIMEOUT)
+def group_batch(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    response = render_batch(
+        request, group.posts.select_related('author', 'group')
+    )
+    return add_surrogate_keys(response, surrogates.group_key(slug))
+
+
+@edge_cache
+@cache_page_single_flight(settings.FEED_BATCH_TIMEOUT)
+def profile_batch(request, username):
+    author = get_object_or_404(User, username=username)
+    response = render_batch(
+        request, author.posts.select_related('author', 'group')
+    )
+    return add_surrogate_keys(response, surrogates.author_key(username))
+
+
+def render_events(request, get_channels):
+    """Server-Sent Events: сколько в каналах постов новее ?after=.
+
+    get_channels вызывается, только если новые события есть.
+    """
+    try:
+        after = int(request.GET['after'])
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest()
+    events, overflow = events_after(after)
+    if events:
+        channels = set(get_channels())
+        event_ids = {
+            event_id for event_id, event_channels in events
+            if not channels.isdisjoint(event_channels)
+        }
+        if event_ids:
+            return sse_response(
+                'posts', {'count': len(event_ids), 'more': overflow}
+            )
+    return sse_response()
+
+
+def index_events(request):
+    return render_events(request, lambda: [counts.INDEX_SCOPE])
+
+
+def group_events(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return render_events(request, lambda: [counts.group_scope(group.pk)])
 
 
 @login_required
+def follow_events(request):
+    def channels():
+        authors = Follow.objects.filter(
+            user=request.user
+        ).values_list('author_id', flat=True)
+        return [counts.author_scope(author_id) for author_id in authors]
+    return render_events(request, channels)
+
+
+def render_rollup(request, title, ids, *keys):
+    page_obj = rollups.posts_by_ids(ids)
+    response = render(
+        request, 'posts/popular.html', {'title': title, 'page_obj': page_obj}
+    )
+    return add_surrogate_keys(
+        response, *keys, *surrogates.page_keys(page_obj)
+    )
+
+
+@edge_cache
+@cache_page_single_flight(settings.ROLLUP_PAGE_TIMEOUT)
+def popular(request):
+    return render_rollup(
+        request, 'Популярное за неделю', rollups.popular_ids(),
+        surrogates.INDEX_KEY
+    )
+
+
+@edge_cache
+@cache_page_single_flight(settings.ROLLUP_PAGE_TIMEOUT)
+def group_trending(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return render_rollup(
+        request, f'В тренде в группе {group.title}',
+        rollups.trending_ids(group.pk), surrogates.group_key(slug)
+    )
+
+
+@edge_cache
+@cache_page_single_flight(settings.ROLLUP_PAGE_TIMEOUT)
+def popular_sidebar(request):
+    """Фрагмент боковой колонки, его подгружает base.html."""
+    posts = rollups.posts_by_ids(
+        rollups.popular_ids()[:settings.POPULAR_SIDEBAR_SIZE]
+    )
+    response = render(
+        request, 'posts/includes/popular_sidebar.html', {'posts': posts}
+    )
+    return add_surrogate_keys(
+        response, *[surrogates.post_key(post.pk) for post in posts]
+    )
+
+
+def enqueue_thumbnail(post):
+    if post.image:
+        enqueue(
+            build_thumbnail,
+            post.pk,
+            key=f'thumbnail:{post.pk}:{post.image.name}'
+        )
+
+
+@login_required
+@ratelimit('post_create', key='user')
 def post_create(request):
     if request.method != 'POST':
         form = PostForm()
@@ -92,6 +327,7 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        enqueue_thumbnail(post)
         return redirect('posts:profile', username=post.author)
     return render(request, 'posts/create_post.html',
                   {'form': form})
@@ -110,6 +346,7 @@ def post_edit(request, post_id):
     if form.is_valid():
         post = form.save(commit=False)
         post.save()
+        enqueue_thumbnail(post)
         return redirect('posts:post_detail', post.pk)
     context = {
         'post': post,
@@ -119,7 +356,12 @@ def post_edit(request, post_id):
     return render(request, 'posts/create_post.html', context)
 
 
+def is_ajax(request):
+    return request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+
 @login_required
+@ratelimit('add_comment', key='user')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -128,31 +370,73 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        if is_ajax(request):
+            return render(
+                request, 'posts/includes/comment.html',
+                {'comment': comment}, status=HTTPStatus.CREATED
+            )
+    elif is_ajax(request):
+        return JsonResponse(
+            {'errors': form.errors}, status=HTTPStatus.BAD_REQUEST
+        )
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
     posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = paginator(request, posts)
+    page_obj = paginator(
+        request, posts, counts.follow_scope(request.user.pk)
+    )
     context = {
         'posts': posts,
         'page_obj': page_obj,
+        'batch_url': reverse('posts:follow_batch'),
+        'suggestions': recommendations.suggestions(request.user),
+        'events_url': events_url(page_obj, 'posts:follow_events'),
     }
-    return render(request, 'posts/follow.html', context)
+    return render(
+        request, 'posts/follow.html', context,
+        using=template_engine(request)
+    )
+
+
+@login_required
+@cache_page_single_flight(settings.FEED_BATCH_TIMEOUT)
+def follow_batch(request):
+    return render_batch(
+        request,
+        Post.objects.filter(
+            author__following__user=request.user
+        ).select_related('author', 'group')
+    )
+
+
+def follow_response(request, author, following):
+    """JSON с новым состоянием подписки для AJAX, иначе редирект."""
+    if is_ajax(request):
+        return JsonResponse({
+            'following': following,
+            'followers_count': counts.followers_count(author.pk),
+        })
+    return redirect('posts:profile', username=author.username)
 
 
 @login_required
+@require_POST
+@ratelimit('profile_follow', key='user', methods=None)
 def profile_follow(request, username):
     user = request.user
     author = get_object_or_404(User, username=username)
     if author.id != user.id:
         Follow.objects.get_or_create(user=request.user, author=author)
-    return redirect('posts:profile', username=username)
+    return follow_response(request, author, author.id != user.id)
 
 
 @login_required
+@require_POST
+@ratelimit('profile_follow', key='user', methods=None)
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
-    return redirect('posts:profile', username=username)
+    return follow_response(request, author, False)
@@ -1,5 +1,9 @@
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.contrib.auth import get_user_model
+from django.contrib.sites.shortcuts import get_current_site
+
+from jobs.queue import enqueue
+from .tasks import send_password_reset
 
 User = get_user_model()
 
@@ -8,3 +12,29 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо для сброса пароля отправляется фоновой задачей.
+
+    В задачу попадает id пользователя, а не готовое письмо: ссылку с
+    токеном задача строит сама. Свой token_generator не поддерживается.
+    """
+
+    def save(self, domain_override=None,
+             subject_template_name='registration/password_reset_subject.txt',
+             email_template_name='registration/password_reset_email.html',
+             use_https=False, token_generator=None, from_email=None,
+             request=None, html_email_template_name=None,
+             extra_email_context=None):
+        if domain_override is None:
+            site = get_current_site(request)
+            site_name, domain = site.name, site.domain
+        else:
+            site_name = domain = domain_override
+        for user in self.get_users(self.cleaned_data['email']):
+            enqueue(
+                send_password_reset, user.pk, domain, site_name, use_https,
+                subject_template_name, email_template_name, from_email,
+                html_email_template_name, extra_email_context
+            )
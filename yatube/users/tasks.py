@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.forms import PasswordResetForm
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMultiAlternatives
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from jobs.queue import task
+
+User = get_user_model()
+
+
+@task
+def send_email(subject, body, from_email, to, html_body=None):
+    message = EmailMultiAlternatives(subject, body, from_email, to)
+    if html_body is not None:
+        message.attach_alternative(html_body, 'text/html')
+    message.send()
+
+
+@task
+def send_password_reset(user_id, domain, site_name, use_https,
+                        subject_template_name, email_template_name,
+                        from_email=None, html_email_template_name=None,
+                        extra_email_context=None):
+    """Письмо со ссылкой для сброса пароля.
+
+    Токен создаётся здесь, поэтому в таблице задач его нет.
+    """
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        return
+    email = getattr(user, User.get_email_field_name())
+    context = {
+        'email': email,
+        'domain': domain,
+        'site_name': site_name,
+        'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+        'user': user,
+        'token': default_token_generator.make_token(user),
+        'protocol': 'https' if use_https else 'http',
+        **(extra_email_context or {}),
+    }
+    PasswordResetForm().send_mail(
+        subject_template_name, email_template_name, context, from_email,
+        email, html_email_template_name=html_email_template_name
+    )
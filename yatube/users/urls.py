@@ -7,12 +7,18 @@ from django.contrib.auth.views import (LoginView, LogoutView,
                                        PasswordResetView)
 from django.urls import path
 
+from core.ratelimit import ratelimit
 from . import views
+from .forms import QueuedPasswordResetForm
 
 app_name = 'users'
 
 urlpatterns = [
-    path('signup/', views.SignUp.as_view(), name='signup'),
+    path(
+        'signup/',
+        ratelimit('signup', key='ip')(views.SignUp.as_view()),
+        name='signup'
+    ),
     path(
         'logout/',
         LogoutView.as_view(template_name='users/logged_out.html'),
@@ -20,13 +26,16 @@ urlpatterns = [
     ),
     path(
         'login/',
-        LoginView.as_view(template_name='users/login.html'),
+        ratelimit('login', key='ip')(
+            LoginView.as_view(template_name='users/login.html')
+        ),
         name='login'
     ),
     path(
         'password_reset/',
         PasswordResetView.as_view(
-            template_name='users/password_reset_form.html'),
+            template_name='users/password_reset_form.html',
+            form_class=QueuedPasswordResetForm),
         name='password_reset_form'
     ),
     path(
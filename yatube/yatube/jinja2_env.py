@@ -0,0 +1,63 @@
+"""Окружение Jinja2 для лент постов (см. JINJA2_VIEWS в settings).
+
+Повторяет теги и фильтры, которые используют шаблоны лент
+в Django: static, url, thumbnail, date, addclass и singleflight.
+"""
+import logging
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache.utils import make_template_fragment_key
+from django.template.defaultfilters import date as date_filter
+from django.urls import reverse
+from django.utils.timezone import template_localtime
+from jinja2 import Environment
+from markupsafe import Markup
+from sorl.thumbnail import get_thumbnail
+
+from core.cache import get_or_compute
+from core.templatetags.pagination import elided_page_range, next_cursor
+from core.templatetags.user_filters import addclass
+from posts.templatetags.post_images import post_thumbnail
+
+logger = logging.getLogger(__name__)
+
+
+def url(name, *args, **kwargs):
+    return reverse(name, args=args, kwargs=kwargs)
+
+
+def date(value, arg=None):
+    return date_filter(template_localtime(value), arg)
+
+
+def thumbnail(file, geometry, **options):
+    """Как тег thumbnail: при ошибке — None вместо исключения."""
+    try:
+        return get_thumbnail(file, geometry, **options)
+    except Exception:
+        logger.exception('Не удалось построить миниатюру %s', file)
+        return None
+
+
+def singleflight(timeout, fragment_name, *vary_on, caller):
+    """Аналог тега singleflight для {% call %}."""
+    key = make_template_fragment_key(fragment_name, vary_on)
+    return Markup(get_or_compute(key, caller, timeout))
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        'static': staticfiles_storage.url,
+        'url': url,
+        'thumbnail': thumbnail,
+        'post_thumbnail': post_thumbnail,
+        'elided_page_range': elided_page_range,
+        'next_cursor': next_cursor,
+        'singleflight': singleflight,
+    })
+    env.filters.update({
+        'date': date,
+        'addclass': addclass,
+    })
+    return env
@@ -22,6 +22,7 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'jobs.apps.JobsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -33,15 +34,118 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.EdgePurgeMiddleware',
+    'core.middleware.PrerenderedPagesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.AdmissionControlMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# ответы меньше этого размера не сжимаются
+COMPRESSION_MIN_SIZE = 512
+# уровни сжатия страниц на лету
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+
+# сколько секунд прокси хранит страницы для анонимов
+EDGE_CACHE_TIMEOUT = 10 * 60
+# адрес, куда отправляются ключи для сброса кэша прокси;
+# пустой — прокси нет, сбрасывать нечего
+EDGE_PURGE_URL = ''
+EDGE_PURGE_TOKEN = ''
+EDGE_PURGE_TIMEOUT = 5
+# сколько ключей отправлять в одном запросе
+EDGE_PURGE_BATCH_SIZE = 256
+
+# куда команда prerender сохраняет неизменные страницы
+PRERENDER_ROOT = os.path.join(BASE_DIR, 'prerendered')
+PRERENDER_CACHE_TIMEOUT = 60 * 60
+
+# ограничения одновременных запросов на процесс
+ADMISSION_MAX_CONCURRENT = 32
+# слоты, которые доступны только запросам на запись
+ADMISSION_RESERVED = 4
+ADMISSION_VIEW_LIMITS = {
+    'posts:follow_index': 4,
+    'posts:profile': 8,
+}
+ADMISSION_WRITE_VIEWS = ('posts:post_create', 'posts:add_comment')
+ADMISSION_QUEUE_SIZE = 16
+ADMISSION_QUEUE_TIMEOUT = 2
+ADMISSION_RETRY_AFTER = 5
+# страницы пагинации дальше этой считаются низкоприоритетными
+ADMISSION_DEEP_PAGE = 20
+ADMISSION_CRAWLER_RE = r'bot|crawl|spider|slurp'
+
+# лимиты частоты запросов: 'число/период', период s, m, h или d;
+# счётчики лежат в общем кэше, поэтому лимит один на все процессы
+RATELIMIT_ENABLE = True
+# за обратным прокси REMOTE_ADDR у всех клиентов один — адрес прокси.
+# Тогда адрес клиента берётся из заголовка, который дописывают прокси
+# (например 'HTTP_X_FORWARDED_FOR'), и число таких прокси перед Django
+RATELIMIT_TRUSTED_PROXY_HEADER = None
+RATELIMIT_TRUSTED_PROXY_COUNT = 1
+RATELIMITS = {
+    'login': '10/m',
+    'signup': '5/h',
+    'post_create': '10/m',
+    'add_comment': '20/m',
+    'profile_follow': '30/m',
+    'post_view': '60/m',
+}
+
 PAGE_POST = 10
+# порции постов для «Показать ещё» и сколько секунд они кэшируются
+FEED_BATCH_SIZE = PAGE_POST
+FEED_BATCH_TIMEOUT = 60
+# уведомления о новых постах: сколько последних событий всех лент
+# хранится в общем кэше, сколько секунд и через сколько миллисекунд
+# EventSource переподключается за новым состоянием
+EVENTS_BUFFER_SIZE = 100
+EVENTS_TIMEOUT = 24 * 60 * 60
+EVENTS_RETRY = 15000
+# счётчики вроде просмотров копят прибавки в кэше и раз в столько
+# секунд переносят их в базу, сколько секунд хранятся не перенесённые
+COUNTERS_FLUSH_INTERVAL = 60
+COUNTERS_TIMEOUT = 24 * 60 * 60
+# рейтинги популярных постов: за сколько дней берутся посты, раз в
+# сколько секунд пересчитываются, сколько хранятся и сколько постов
+# в каждом списке; веса и скорость старения постов в трендах
+ROLLUP_WINDOW = 7
+ROLLUP_INTERVAL = 10 * 60
+ROLLUP_TIMEOUT = 24 * 60 * 60
+ROLLUP_SIZE = 20
+ROLLUP_WEIGHTS = {'comments': 5, 'views': 1, 'followers': 0.5}
+ROLLUP_GRAVITY = 1.5
+# сколько секунд страницы рейтингов хранятся в кэше
+ROLLUP_PAGE_TIMEOUT = 60
+# сколько постов в боковой колонке «Популярное» и показывать ли её
+POPULAR_SIDEBAR_SIZE = 5
+POPULAR_SIDEBAR = True
+# рекомендации «кого почитать»: сколько авторов хранится и показывается,
+# веса друзей друзей и похожих подписок, сколько секунд хранятся,
+# раз в сколько секунд пересчитываются целиком и через сколько после
+# подписки пересчитываются для одного пользователя; строк матрицы
+# за один шаг полного пересчёта
+RECOMMENDATIONS_SIZE = 20
+RECOMMENDATIONS_SHOWN = 5
+RECOMMENDATIONS_WEIGHTS = {'friends': 1, 'cofollow': 1}
+RECOMMENDATIONS_TIMEOUT = 2 * 24 * 60 * 60
+RECOMMENDATIONS_INTERVAL = 24 * 60 * 60
+RECOMMENDATIONS_REFRESH_DELAY = 60
+RECOMMENDATIONS_CHUNK = 1000
+# сколько секунд хранится в кэше общее число постов для пагинатора
+PAGINATOR_COUNT_TIMEOUT = 60
+# счётчики постов по лентам обновляются сигналами, таймаут ограничивает
+# расхождение после массовых изменений в обход сигналов
+POSTS_COUNT_TIMEOUT = 60 * 60
+# с какого размера таблицы вместо COUNT(*) берётся оценка СУБД
+COUNT_ESTIMATE_THRESHOLD = 100000
 
 ROOT_URLCONF = 'yatube.urls'
 
@@ -50,19 +154,52 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # в разработке шаблоны читаются с диска при каждом рендере,
+            # в продакшене разбираются один раз (см. core.templating)
+            'loaders': [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ] if DEBUG else [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.sidebar.sidebar',
             ],
         },
     },
 ]
 
+# Jinja2 — необязательный шаблонизатор для горячих лент, шаблоны
+# лежат в templates_jinja2/. Если Jinja2 установлен, виды
+# из JINJA2_VIEWS рендерятся им
+JINJA2_VIEWS = []
+try:
+    import jinja2  # noqa: F401
+except ImportError:
+    pass
+else:
+    TEMPLATES.append({
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [os.path.join(BASE_DIR, 'templates_jinja2')],
+        'OPTIONS': {
+            'environment': 'yatube.jinja2_env.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+                'core.context_processors.year.year',
+                'core.context_processors.sidebar.sidebar',
+            ],
+        },
+    })
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
@@ -98,12 +235,47 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# кэш общий для веб-процессов, воркера очереди и команд: в нём копятся
+# счётчики, лежат рейтинги, рекомендации и события лент. Таблицу
+# создаёт миграция core. Под нагрузкой лучше memcached или Redis:
+# в них add и incr атомарны
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'yatube_cache',
     }
 }
 
+# очередь отложенных задач, воркер: python manage.py run_jobs
+JOBS_PROCESSES = 2
+JOBS_MAX_ATTEMPTS = 5
+# пауза перед первым повтором, дальше удваивается
+JOBS_RETRY_DELAY = 10
+# через сколько секунд задача зависшего воркера возвращается в очередь
+JOBS_LOCK_TIMEOUT = 10 * 60
+# выполнять задачи сразу при постановке в очередь, без воркера
+JOBS_EAGER = False
+# сколько секунд хранятся завершённые и упавшие задачи и раз в сколько
+# секунд воркер их удаляет
+JOBS_RETENTION = 7 * 24 * 60 * 60
+JOBS_PRUNE_INTERVAL = 60 * 60
+
+# сколько секунд остальные запросы ждут значение, которое считает
+# процесс, взявший блокировку на ключ
+SINGLE_FLIGHT_LOCK_TIMEOUT = 10
+SINGLE_FLIGHT_POLL = 0.05
+# сколько секунд после истечения отдаётся прежнее значение,
+# пока его пересчитывает один запрос
+CACHE_STALE_TIMEOUT = 5 * 60
+
+# сколько секунд ждать базу на публичных страницах
+DB_STATEMENT_TIMEOUT = 5
+# как часто SQLite проверяет таймаут, в инструкциях виртуальной машины
+SQLITE_PROGRESS_STEPS = 10000
+# сохранённые копии страниц на случай недоступности базы
+STALE_IF_ERROR_TIMEOUT = 24 * 60 * 60
+STALE_IF_ERROR_REFRESH = 60
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 # Internationalization
@@ -115,6 +287,33 @@ LOGIN_REDIRECT_URL = 'posts:index'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# через сколько секунд файл без ссылок из постов можно удалить
+IMAGE_GC_GRACE = 60 * 60
+# где лежат картинки постов и миниатюры: на диске в MEDIA_ROOT
+# или в S3-совместимом хранилище ('core.s3.S3Storage')
+MEDIA_STORAGE_BACKEND = 'django.core.files.storage.FileSystemStorage'
+THUMBNAIL_STORAGE = MEDIA_STORAGE_BACKEND
+# кто отдаёт байты медиафайлов: None — сам Django,
+# 'nginx' — X-Accel-Redirect, 'apache' — X-Sendfile
+MEDIA_SENDFILE = None
+# internal location в nginx, который смотрит в MEDIA_ROOT
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+# кэширование медиа: файлы с хэшем в имени — на год,
+# остальные — на час с проверкой по ETag
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 365
+MEDIA_CACHE_TIMEOUT = 60 * 60
+S3_STORAGE = {
+    'ENDPOINT_URL': 'http://127.0.0.1:9000',
+    'BUCKET': 'yatube',
+    'ACCESS_KEY': '',
+    'SECRET_KEY': '',
+    'REGION': 'us-east-1',
+    # сколько секунд действует подписанная ссылка на файл
+    'URL_EXPIRE': 24 * 60 * 60,
+    'MULTIPART_THRESHOLD': 8 * 1024 * 1024,
+    'MULTIPART_CHUNK_SIZE': 8 * 1024 * 1024,
+    'MAX_POOL_CONNECTIONS': 10,
+}
 
 TIME_ZONE = 'UTC'
 
@@ -129,3 +328,14 @@ USE_TZ = True
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# collectstatic добавляет хэш в имена и пишет рядом .gz и .br
+STATICFILES_STORAGE = 'core.static.CompressedManifestStaticFilesStorage'
+# без манифеста ссылки на статику ведут на файлы без хэша; в продакшене
+# это ошибка, иначе такие файлы навсегда закэшируются у клиентов
+STATIC_MANIFEST_STRICT = not DEBUG
+# файлы меньше этого размера не сжимаются
+STATIC_COMPRESS_MIN_SIZE = 256
+# кэширование статики: с хэшем в имени — на год, без него — на час
+STATIC_CACHE_MAX_AGE = 60 * 60 * 24 * 365
+STATIC_CACHE_TIMEOUT = 60 * 60
@@ -1,7 +1,9 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.media import serve_media
+from core.static import serve_static
 
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
@@ -9,13 +11,27 @@ urlpatterns = [
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('', include('core.urls', namespace='core')),
 ]
 
 handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.permission_denied'
 handler500 = 'core.views.server_error'
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
+if settings.MEDIA_URL.startswith('/'):
+    urlpatterns += [
+        re_path(
+            r'^%s(?P<name>.+)$' % settings.MEDIA_URL.lstrip('/'),
+            serve_media,
+            name='media'
+        ),
+    ]
+
+if settings.STATIC_URL.startswith('/'):
+    urlpatterns += [
+        re_path(
+            r'^%s(?P<name>.+)$' % settings.STATIC_URL.lstrip('/'),
+            serve_static,
+            name='static'
+        ),
+    ]
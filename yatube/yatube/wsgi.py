@@ -5,3 +5,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# шаблоны разбираются при старте воркера, а не на первых запросах
+from core.templating import precompile_templates  # noqa: E402
+
+precompile_templates()